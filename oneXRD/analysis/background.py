@@ -1,5 +1,17 @@
 import numpy as np
 
+# =============================================================================
+# Optional Dependency Check
+# =============================================================================
+# Numba is optional. When installed, it compiles the erosion sweep; otherwise
+# the NumPy implementation is used.
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
 
 # =============================================================================
 # Custom Exception
@@ -68,28 +80,91 @@ def subtract_iterative_erosion(intensities, iterations=50):
                                     more aggressive background. Defaults to 50.
 
     Returns:
-        np.ndarray: An array of the calculated background values.
+        np.ndarray: An array of the calculated background values. It keeps
+                    the dtype of float inputs (e.g. float32); other inputs
+                    are converted to float64.
     """
-    background = np.copy(intensities)
+    intensities = np.asarray(intensities)
+    dtype = intensities.dtype if np.issubdtype(intensities.dtype, np.floating) else np.float64
+    background = np.array(intensities, dtype=dtype)
+    if NUMBA_AVAILABLE:
+        return _erosion_sweep_jit(background, iterations)
+    return _erosion_sweep(background, iterations)
 
-    for _ in range(iterations):
-        # Shift the array to get left and right neighbors
-        shifted_left = np.roll(background, 1)
-        shifted_right = np.roll(background, -1)
 
-        # Take the average of the neighbors
-        neighbors_avg = (shifted_left + shifted_right) / 2.0
+def _erosion_sweep(background, iterations):
+    """
+    Runs the erosion iterations in place on a 1-D float array.
+
+    Each pass pulls every point down to the average of its two neighbours
+    (wrapping around at the ends, as np.roll would). The neighbour average is
+    written into a single preallocated buffer, so no temporaries are created
+    per iteration.
+
+    Args:
+        background (np.ndarray): The float array to erode. Modified in place.
+        iterations (int): The number of iterations to perform.
+
+    Returns:
+        np.ndarray: The eroded array (the same object as ``background``).
+    """
+    if background.size < 2:
+        return background
+
+    neighbors_avg = np.empty_like(background)
+    for _ in range(iterations):
+        # Sum of the left and right neighbours, including the wrapped end points
+        np.add(background[:-2], background[2:], out=neighbors_avg[1:-1])
+        neighbors_avg[0] = background[-1] + background[1]
+        neighbors_avg[-1] = background[-2] + background[0]
+        neighbors_avg *= 0.5
 
         # The core of the algorithm: if a point is higher than the average
         # of its neighbors, pull it down.
-        background = np.minimum(background, neighbors_avg)
+        np.minimum(background, neighbors_avg, out=background)
 
     return background
 
 
+if NUMBA_AVAILABLE:
+    # Cached on disk so spawned batch workers load the kernel instead of
+    # compiling it. The cache refers to this module by its package name, so
+    # the test block below must be run as a module (see there).
+    @njit(cache=True, nogil=True)
+    def _erosion_sweep_jit(background, iterations):
+        """
+        Compiled equivalent of _erosion_sweep.
+
+        Each pass walks the array once, carrying the previous point's value
+        from before the update, so the result matches the NumPy version
+        exactly. ``nogil`` lets several batch threads erode at the same time.
+        """
+        n = background.shape[0]
+        if n < 2:
+            return background
+
+        for _ in range(iterations):
+            first = background[0]
+            prev = background[n - 1]
+            for i in range(n):
+                current = background[i]
+                right = background[i + 1] if i < n - 1 else first
+                neighbors_avg = (prev + right) * 0.5
+                # Same NaN propagation as np.minimum
+                if neighbors_avg < current or neighbors_avg != neighbors_avg:
+                    background[i] = neighbors_avg
+                prev = current
+
+        return background
+
+
 # =============================================================================
 # Standalone Test Block
 # =============================================================================
+# Run from the repository root with:
+#     python -m oneXRD.analysis.background
+# Running the file directly fails Test 2 once the package has cached the
+# compiled kernel, as the cache cannot be loaded outside the package.
 
 if __name__ == '__main__':
     import matplotlib.pyplot as plt
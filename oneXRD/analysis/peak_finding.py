@@ -16,6 +16,42 @@ class PeakFindingError(Exception):
 # Peak Finding Function (Corrected)
 # =============================================================================
 
+def _detect_peaks(angles, intensities, min_height, min_prominence, min_width):
+    """
+    Runs scipy's peak detection and measures the FWHM of each peak.
+
+    Returns:
+        tuple[np.ndarray, dict, np.ndarray]: The peak indices, the properties
+                                             dict from find_peaks, and the
+                                             FWHM of each peak in degrees.
+    """
+    peak_indices, properties = find_peaks(
+        intensities,
+        height=min_height,
+        prominence=min_prominence,
+        width=min_width
+    )
+
+    if len(peak_indices) == 0:
+        return peak_indices, properties, np.empty(0)
+
+    # --- FIX 1: Safely calculate widths only if peaks were found ---
+    # Reuse what find_peaks already computed for the filters rather than
+    # letting peak_widths evaluate it again.
+    if 'widths' in properties:
+        # find_peaks measures widths at rel_height=0.5 by default
+        widths = properties['widths']
+    elif 'prominences' in properties:
+        prominence_data = (properties['prominences'], properties['left_bases'], properties['right_bases'])
+        widths, _, _, _ = peak_widths(intensities, peak_indices, rel_height=0.5, prominence_data=prominence_data)
+    else:
+        widths, _, _, _ = peak_widths(intensities, peak_indices, rel_height=0.5)
+    avg_angle_step = np.mean(np.diff(angles))
+    fwhm_angles = widths * avg_angle_step
+
+    return peak_indices, properties, fwhm_angles
+
+
 def find_all_peaks(angles, intensities, min_height=None, min_prominence=None, min_width=None):
     """
     Finds peaks in the given XRD data.
@@ -38,21 +74,13 @@ def find_all_peaks(angles, intensities, min_height=None, min_prominence=None, mi
                       peaks are found.
     """
     try:
-        peak_indices, properties = find_peaks(
-            intensities,
-            height=min_height,
-            prominence=min_prominence,
-            width=min_width
+        peak_indices, properties, fwhm_angles = _detect_peaks(
+            angles, intensities, min_height, min_prominence, min_width
         )
 
         if len(peak_indices) == 0:
             return pd.DataFrame(columns=['angle', 'intensity', 'prominence', 'fwhm_angle'])
 
-        # --- FIX 1: Safely calculate widths only if peaks were found ---
-        widths, _, _, _ = peak_widths(intensities, peak_indices, rel_height=0.5)
-        avg_angle_step = np.mean(np.diff(angles))
-        fwhm_angles = widths * avg_angle_step
-
         # --- FIX 2: Use .get() for safe access to optional properties ---
         peak_df = pd.DataFrame({
             'angle': angles[peak_indices],
@@ -70,6 +98,40 @@ def find_all_peaks(angles, intensities, min_height=None, min_prominence=None, mi
         raise PeakFindingError(f"An unexpected error occurred during peak finding: {e}")
 
 
+def find_all_peaks_arrays(angles, intensities, min_height=None, min_prominence=None, min_width=None):
+    """
+    Finds peaks like find_all_peaks, but returns plain NumPy arrays.
+
+    Intended for hot paths such as batch processing, where building a
+    DataFrame for every pattern costs more than the peak search itself.
+    The interactive UI should keep using find_all_peaks.
+
+    Args:
+        angles (np.ndarray): The array of 2-theta angles.
+        intensities (np.ndarray): The array of corresponding intensities.
+                                 (Should be background-subtracted).
+        min_height (float, optional): The minimum height of a peak.
+        min_prominence (float, optional): The minimum prominence of a peak.
+        min_width (float, optional): The minimum width of a peak in data points.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: The peak angles and
+            intensities (in the dtype of the inputs, e.g. float32) and the
+            FWHMs in degrees (float64), in data order. All three are empty
+            if no peaks are found.
+    """
+    try:
+        peak_indices, _, fwhm_angles = _detect_peaks(
+            angles, intensities, min_height, min_prominence, min_width
+        )
+        return (np.asarray(angles)[peak_indices],
+                np.asarray(intensities)[peak_indices],
+                np.asarray(fwhm_angles, dtype=np.float64))
+
+    except Exception as e:
+        raise PeakFindingError(f"An unexpected error occurred during peak finding: {e}")
+
+
 # =============================================================================
 # Standalone Test Block (Corrected)
 # =============================================================================
@@ -8,9 +8,15 @@ class DatabaseFrame(ctk.CTkFrame):
     in the database.
     """
 
+    # Number of rows inserted per idle callback when repopulating the list.
+    INSERT_CHUNK = 200
+
     def __init__(self, master, controller):
         super().__init__(master)
         self.controller = controller
+        self._experiment_map = {}
+        self._insert_state = None
+        self._insert_job = None
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
 
@@ -57,13 +63,36 @@ class DatabaseFrame(ctk.CTkFrame):
         self.delete_button.grid(row=0, column=2, padx=(5, 0), sticky="ew")
 
     def update_experiment_list(self, experiments):
-        """Clears and repopulates the list of experiments."""
+        """
+        Clears and repopulates the list of experiments.
+
+        Rows are inserted in chunks from idle callbacks so that large
+        databases do not freeze the UI while the list is being filled.
+        """
+        if self._insert_job is not None:
+            self.after_cancel(self._insert_job)
+            self._insert_job = None
         self.experiment_listbox.delete(0, END)
         self._experiment_map = {}
-        for i, (exp_id, name, ts) in enumerate(experiments):
-            display_text = f" {name} ({ts.split('.')[0]})"
-            self.experiment_listbox.insert(END, display_text)
-            self._experiment_map[i] = exp_id
+        self._insert_state = (0, list(experiments))
+        self._continue_insert()
+
+    def _continue_insert(self):
+        """Inserts the next chunk of experiments and reschedules itself if rows remain."""
+        start, experiments = self._insert_state
+        stop = min(start + self.INSERT_CHUNK, len(experiments))
+        chunk = experiments[start:stop]
+        if chunk:
+            self.experiment_listbox.insert(END, *(f" {name} ({ts.split('.')[0]})" for _, name, ts in chunk))
+            for i, (exp_id, _, _) in enumerate(chunk, start=start):
+                self._experiment_map[i] = exp_id
+
+        if stop < len(experiments):
+            self._insert_state = (stop, experiments)
+            self._insert_job = self.after_idle(self._continue_insert)
+        else:
+            self._insert_state = None
+            self._insert_job = None
 
     def _on_load_clicked(self):
         """Handles the load button click."""
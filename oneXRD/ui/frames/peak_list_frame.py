@@ -8,9 +8,14 @@ class PeakListFrame(ctk.CTkFrame):
     A frame for displaying the list of found peaks in a table.
     """
 
+    # Number of rows inserted per idle callback when repopulating the table.
+    INSERT_CHUNK = 200
+
     def __init__(self, master, controller):
         super().__init__(master)
         self.controller = controller
+        self._insert_state = None
+        self._insert_job = None
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(1, weight=1)
 
@@ -65,23 +70,45 @@ class PeakListFrame(ctk.CTkFrame):
         """
         Clears and repopulates the peak list table.
 
+        Rows are inserted in chunks from idle callbacks so that long peak
+        lists do not freeze the UI while the table is being filled.
+
         Args:
             peaks_df (pd.DataFrame): DataFrame containing the peak information.
         """
+        if self._insert_job is not None:
+            self.after_cancel(self._insert_job)
+            self._insert_job = None
+
         # Clear existing items
-        for i in self.tree.get_children():
-            self.tree.delete(i)
+        self.tree.delete(*self.tree.get_children())
 
         # Insert new items from the DataFrame
         if peaks_df is not None and not peaks_df.empty:
-            for index, row in peaks_df.iterrows():
-                # Format the values for display
-                angle_val = f"{row.get('angle', 0):.4f}"
-                intensity_val = f"{row.get('intensity', 0):.2f}"
-                prominence_val = f"{row.get('prominence', 0):.2f}"
-                fwhm_val = f"{row.get('fwhm_angle', 0):.4f}"
-
-                self.tree.insert('', 'end', values=(angle_val, intensity_val, prominence_val, fwhm_val))
+            self._insert_state = (0, peaks_df)
+            self._continue_insert()
+        else:
+            self._insert_state = None
+
+    def _continue_insert(self):
+        """Inserts the next chunk of peaks and reschedules itself if rows remain."""
+        start, peaks_df = self._insert_state
+        stop = min(start + self.INSERT_CHUNK, len(peaks_df))
+        for index, row in peaks_df.iloc[start:stop].iterrows():
+            # Format the values for display
+            angle_val = f"{row.get('angle', 0):.4f}"
+            intensity_val = f"{row.get('intensity', 0):.2f}"
+            prominence_val = f"{row.get('prominence', 0):.2f}"
+            fwhm_val = f"{row.get('fwhm_angle', 0):.4f}"
+
+            self.tree.insert('', 'end', values=(angle_val, intensity_val, prominence_val, fwhm_val))
+
+        if stop < len(peaks_df):
+            self._insert_state = (stop, peaks_df)
+            self._insert_job = self.after_idle(self._continue_insert)
+        else:
+            self._insert_state = None
+            self._insert_job = None
 
 
 # =============================================================================
@@ -5,6 +5,7 @@ import numpy as np
 # Matplotlib imports for embedding the plot
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.collections import LineCollection
 
 # We need our XRDData class for type hinting and testing
 # This assumes the script is run from the project root or the package is installed
@@ -31,6 +32,7 @@ class PlotFrame(ctk.CTkFrame):
         # --- Matplotlib Figure and Canvas ---
         self.figure = Figure(figsize=(5, 4), dpi=100)
         self.ax = self.figure.add_subplot(111)
+        self._create_artists()
 
         self.canvas = FigureCanvasTkAgg(self.figure, self)
         self.canvas.get_tk_widget().pack(side="top", fill="both", expand=True)
@@ -42,18 +44,89 @@ class PlotFrame(ctk.CTkFrame):
         self.toolbar.update()
 
         self.format_plot()
+        # Solve the layout once here and again only when the widget is resized;
+        # labels and grid do not change between redraws.
+        self.figure.tight_layout()
+        self.canvas.mpl_connect('resize_event', lambda event: self.figure.tight_layout())
+
+    def _create_artists(self):
+        """
+        Creates the persistent plot artists with empty data.
+
+        Redraws only swap the data held by these artists, so no Line2D or
+        collection objects are allocated after construction.
+        """
+        self._main_line, = self.ax.plot([], [], label="data")
+        self._bg_line, = self.ax.plot([], [], 'r--', label="Background")
+        self._peak_line, = self.ax.plot([], [], 'kx', markersize=8, label="Peaks")
+        # One stick collection per reference file; created as needed and reused afterwards
+        self._ref_colls = []
+        self._ref_count = 0
+
+        for artist in (self._main_line, self._bg_line, self._peak_line):
+            artist.set_visible(False)
 
     def format_plot(self):
         """Applies standard formatting to the plot."""
         self.ax.set_xlabel("Angle (2θ)")
         self.ax.set_ylabel("Intensity (a.u.)")
         self.ax.grid(True, linestyle='--', alpha=0.6)
-        self.figure.tight_layout()
+
+    def _update_legend(self):
+        """Shows a legend for the visible artists only."""
+        artists = [self._main_line, self._bg_line, self._peak_line] + self._ref_colls
+        handles = [a for a in artists if a.get_visible()]
+        legend = self.ax.get_legend()
+        if handles:
+            self.ax.legend(handles=handles)
+        elif legend is not None:
+            legend.remove()
+
+    @staticmethod
+    def _reference_segments(ref_data, max_intensity, offset=0):
+        """Builds vertical line segments for a reference pattern, scaled to 50% of plot height."""
+        angles = np.asarray(ref_data.raw_angles, dtype=float)
+        scaled_intensities = (np.asarray(ref_data.raw_intensities, dtype=float) / 100.0) * max_intensity * 0.5
+        segments = np.empty((len(angles), 2, 2))
+        segments[:, 0, 0] = angles
+        segments[:, 0, 1] = offset
+        segments[:, 1, 0] = angles
+        segments[:, 1, 1] = scaled_intensities + offset
+        return list(segments)
+
+    def _set_reference(self, index, segments, name, alpha=None):
+        """Shows a reference pattern in the index-th stick collection, creating it if needed."""
+        if index == len(self._ref_colls):
+            # autolim=False: the data limits are extended explicitly in _include_in_view
+            coll = LineCollection([], colors='green')
+            self.ax.add_collection(coll, autolim=False)
+            self._ref_colls.append(coll)
+        coll = self._ref_colls[index]
+        coll.set_segments(segments)
+        coll.set_label(name)
+        coll.set_alpha(alpha)
+        coll.set_visible(True)
+
+    def _hide_references(self, start=0):
+        """Hides the stick collections from ``start`` on and keeps them for reuse."""
+        for coll in self._ref_colls[start:]:
+            coll.set_segments([])
+            coll.set_visible(False)
+        self._ref_count = min(self._ref_count, start)
+
+    def _include_in_view(self, segments):
+        """Extends the data limits by the reference sticks and rescales the view, as vlines() would."""
+        if segments:
+            self.ax.update_datalim(np.concatenate(segments))
+            self.ax.autoscale_view()
 
     def clear_plot(self):
         """Clears all data from the plot."""
-        self.ax.clear()
-        self.format_plot()
+        for line in (self._main_line, self._bg_line, self._peak_line):
+            line.set_data([], [])
+            line.set_visible(False)
+        self._hide_references()
+        self._update_legend()
         self.canvas.draw()
 
     def plot_data(self, xrd_data_obj, reference_list=None):
@@ -65,44 +138,55 @@ class PlotFrame(ctk.CTkFrame):
             reference_list (list[XRDData], optional): A list of reference patterns
                                                       to overlay.
         """
-        self.ax.clear()
-
         # Plot the main intensity data
-        self.ax.plot(xrd_data_obj.processed_angles, xrd_data_obj.processed_intensities, label=xrd_data_obj.display_name)
+        self._main_line.set_data(xrd_data_obj.processed_angles, xrd_data_obj.processed_intensities)
+        self._main_line.set_label(xrd_data_obj.display_name)
+        self._main_line.set_visible(True)
 
         # Plot the background curve if it exists
         if xrd_data_obj.background_curve is not None:
-            self.ax.plot(xrd_data_obj.raw_angles, xrd_data_obj.background_curve, 'r--', label="Background")
+            self._bg_line.set_data(xrd_data_obj.raw_angles, xrd_data_obj.background_curve)
+            self._bg_line.set_visible(True)
+        else:
+            self._bg_line.set_data([], [])
+            self._bg_line.set_visible(False)
 
         # Plot markers for found peaks if they exist
         if not xrd_data_obj.peaks_df.empty:
-            self.ax.plot(xrd_data_obj.peaks_df['angle'], xrd_data_obj.peaks_df['intensity'], 'kx', markersize=8,
-                         label="Peaks")
+            self._peak_line.set_data(xrd_data_obj.peaks_df['angle'], xrd_data_obj.peaks_df['intensity'])
+            self._peak_line.set_visible(True)
+        else:
+            self._peak_line.set_data([], [])
+            self._peak_line.set_visible(False)
 
-        # --- NEW: Plot all references ---
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+        # --- Plot all references ---
+        all_segments = []
         if reference_list:
             max_intensity = self.ax.get_ylim()[1]
-            for ref_data in reference_list:
+            for i, ref_data in enumerate(reference_list):
                 # Use vertical lines for reference peaks for clarity
-                scaled_intensities = (ref_data.raw_intensities / 100.0) * max_intensity * 0.5
-                self.ax.vlines(ref_data.raw_angles, 0, scaled_intensities, color='green', alpha=0.7,
-                               label=ref_data.display_name)
-
-        self.format_plot()
-        self.ax.legend()
+                segments = self._reference_segments(ref_data, max_intensity)
+                self._set_reference(i, segments, ref_data.display_name, alpha=0.7)
+                all_segments.extend(segments)
+        self._ref_count = len(reference_list or ())
+        self._hide_references(self._ref_count)
+        self._include_in_view(all_segments)
+
+        self._update_legend()
         self.canvas.draw()
 
     def plot_reference_data(self, ref_data_obj, offset=0):
         """Overlays a reference pattern on the existing plot."""
-        # Use vertical lines for reference peaks for clarity
         max_intensity = self.ax.get_ylim()[1]
-        scaled_intensities = (ref_data_obj.raw_intensities / 100.0) * max_intensity * 0.5  # Scale to 50% of plot height
-
-        self.ax.vlines(ref_data_obj.raw_angles, offset, scaled_intensities + offset, color='green',
-                       label=ref_data_obj.display_name)
+        segments = self._reference_segments(ref_data_obj, max_intensity, offset)
+        self._set_reference(self._ref_count, segments, ref_data_obj.display_name)
+        self._ref_count += 1
+        self._include_in_view(segments)
 
-        self.format_plot()
-        self.ax.legend()
+        self._update_legend()
         self.canvas.draw()
 
 
@@ -1,5 +1,13 @@
+import csv
+import itertools
+import multiprocessing
 import os
-import pandas as pd
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import numpy as np
 
 # Import the UI we created for this plugin
 from .ui import BatchWindow
@@ -10,6 +18,291 @@ from oneXRD.importers import load_data, DataImportError
 from oneXRD.analysis import background as bg_analysis
 from oneXRD.analysis import peak_finding as pk_analysis
 
+# Columns of the results CSV, written one row per file as results arrive.
+RESULT_FIELDS = ['filename', 'status', 'strongest_peak_angle', 'strongest_peak_intensity', 'strongest_peak_fwhm']
+# Number of completed files between explicit flushes of the results CSV.
+FLUSH_EVERY = 50
+# Number of worker processes (or threads) used for a batch.
+MAX_WORKERS = os.cpu_count() or 1
+# Default time a single file may run before it is skipped, in seconds.
+PER_FILE_TIMEOUT_S = 60
+# How often the batch loop wakes up to check for timed-out files, in seconds.
+POLL_INTERVAL_S = 0.5
+# Number of directory entries enumerated before they are handed to the pool.
+SCAN_CHUNK = 256
+
+
+# Maximum number of parsed files kept in the load cache.
+LOAD_CACHE_SIZE = 1024
+# Parsed (angles, intensities) of previously processed files, keyed by
+# (path, mtime, size) so edited files are re-read. Lives in the main process
+# and survives between batches; least recently used entries are evicted first.
+_load_cache = OrderedDict()
+
+
+def _iter_files(folder, exclude=None, chunk=SCAN_CHUNK):
+    """
+    Enumerates the regular files in a folder a chunk at a time, so processing
+    can start before a very large folder has been fully listed.
+
+    Args:
+        folder (str): The folder to scan.
+        exclude (str, optional): A file name to skip (e.g. the results CSV).
+        chunk (int): The maximum number of files per yielded list.
+
+    Yields:
+        list[tuple[str, str]]: (name, path) of up to ``chunk`` files.
+    """
+    batch = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            # DirEntry.is_file() reuses the type reported by the directory listing
+            if entry.is_file() and entry.name != exclude:
+                batch.append((entry.name, entry.path))
+                if len(batch) >= chunk:
+                    yield batch
+                    batch = []
+    if batch:
+        yield batch
+
+
+def _cache_key(filepath):
+    """Returns the load-cache key for a file, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return filepath, st.st_mtime_ns, st.st_size
+
+
+def _cache_get(key):
+    """Looks up a parsed file in the load cache."""
+    data = _load_cache.get(key)
+    if data is not None:
+        _load_cache.move_to_end(key)
+    return data
+
+
+def _cache_put(key, data):
+    """Stores a parsed file in the load cache, evicting the oldest entry if full."""
+    _load_cache[key] = data
+    if len(_load_cache) > LOAD_CACHE_SIZE:
+        _load_cache.popitem(last=False)
+
+
+def _process_one(filepath, params, data=None):
+    """
+    Runs the load -> background -> peak-finding pipeline for a single file.
+
+    This is a module-level function so it can be pickled and executed in a
+    worker process.
+
+    Args:
+        filepath (str): The path to the data file.
+        params (dict): The batch parameters gathered by the UI.
+        data (tuple[np.ndarray, np.ndarray], optional): Already parsed
+            (angles, intensities) from the load cache. If None, the file
+            is read from disk.
+
+    Returns:
+        tuple: (status, peak, error, loaded) where status is 'OK', 'N/A' if
+            no peaks were found, 'ERROR', or '' if peak finding is disabled
+            and no row is written; peak is the strongest peak's
+            (angle, intensity, fwhm_angle) or None; error is an error message
+            (None on success); and loaded is the freshly parsed
+            (angles, intensities) for the cache, or None if ``data`` was given
+            or loading failed.
+    """
+    loaded = None
+    try:
+        # 1. Load Data
+        if data is None:
+            angles, intensities = load_data(filepath)
+            # Single precision is ample for the erosion and peak search and halves
+            # the memory traffic (and the size of cache entries and results sent back)
+            data = loaded = (np.asarray(angles, dtype=np.float32), np.asarray(intensities, dtype=np.float32))
+        angles, intensities = data
+
+        # 2. Background Subtraction (if enabled)
+        if params['do_background'] and params['bg_iterations'] > 0:
+            baseline = bg_analysis.subtract_iterative_erosion(
+                intensities, iterations=params['bg_iterations']
+            )
+            # Subtract into the baseline's own buffer: no second temporary, and the
+            # loaded intensities (which may go into the load cache) stay untouched.
+            intensities = np.subtract(intensities, baseline, out=baseline)
+
+        # 3. Peak Finding (if enabled)
+        if params['do_peaks']:
+            # Array variant of find_all_peaks: no DataFrame is built per file
+            peak_angles, peak_intensities, peak_fwhms = pk_analysis.find_all_peaks_arrays(
+                angles, intensities, min_prominence=params.get('pk_prominence')
+            )
+            # For this example, we'll just record the strongest peak
+            if peak_intensities.size:
+                strongest_idx = int(peak_intensities.argmax())
+                return 'OK', (peak_angles[strongest_idx], peak_intensities[strongest_idx],
+                              peak_fwhms[strongest_idx]), None, loaded
+            return 'N/A', None, None, loaded
+        return '', None, None, loaded
+
+    except (DataImportError, Exception) as e:
+        return 'ERROR', None, str(e), loaded
+
+
+def _result_row(filename, status, peak):
+    """Builds the CSV row for one file from the values returned by _process_one."""
+    row = {'filename': filename, 'status': status}
+    if peak is not None:
+        row['strongest_peak_angle'], row['strongest_peak_intensity'], row['strongest_peak_fwhm'] = peak
+    return row
+
+
+def _shutdown_executor(executor, worker_pids=None, force=False):
+    """
+    Shuts down the batch pool.
+
+    With ``force``, queued tasks are cancelled and the worker processes that
+    reported their id to ``worker_pids`` are terminated instead of waited for,
+    since a timed-out file may never finish. Threads cannot be killed, so a
+    thread pool is simply left to finish.
+    """
+    if not force:
+        executor.shutdown(wait=True)
+        return
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    while worker_pids is not None and not worker_pids.empty():
+        try:
+            os.kill(worker_pids.get(), signal.SIGTERM)
+        except OSError:
+            pass  # The worker has already exited
+
+
+def _make_executor(workers):
+    """
+    Returns a pool of ``workers`` worker processes for the batch, or a thread
+    pool if worker processes are not supported on this system.
+
+    The workers are spawned rather than forked: the batch runs on a worker
+    thread of the Tk process, and forking a multithreaded process can leave
+    the children deadlocked on locks held by other threads.
+
+    Returns:
+        tuple: The executor and a queue receiving the id of every worker
+        process when it starts (None for a thread pool).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    try:
+        worker_pids = ctx.SimpleQueue()
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                       initializer=_worker_init, initargs=(worker_pids,))
+    except (NotImplementedError, OSError):
+        return ThreadPoolExecutor(max_workers=workers), None
+    # A spawned worker imports this module before its first task; wait for that
+    # here so the start-up time does not count against the per-file timeout
+    wait([executor.submit(_worker_ready) for _ in range(workers)])
+    return executor, worker_pids
+
+
+def _worker_init(worker_pids):
+    """Reports the id of a new worker process so a hung pool can be terminated."""
+    worker_pids.put(os.getpid())
+
+
+def _worker_ready():
+    """Does nothing; submitted to new worker processes to wait for their start-up."""
+    return None
+
+
+def _run_pool(task_chunks, params, timeout, on_result, workers=MAX_WORKERS):
+    """
+    Runs batch tasks on a fresh pool, calling ``on_result(task, result)`` as
+    each file finishes.
+
+    Tasks are taken from ``task_chunks`` one list at a time and submitted
+    while earlier files are already running, so a slow directory scan
+    overlaps with processing.
+
+    A file that runs for longer than ``timeout`` seconds is reported with a
+    'TIMEOUT' status and its result is ignored. Only that file is given up;
+    the other files keep running, and its worker stays busy until it
+    finishes. Only once every worker is held by a timed-out file is the pool
+    torn down (terminating worker processes; threads cannot be killed and
+    are abandoned), and the submitted tasks that had not started are
+    returned for the caller to run on a new pool. No file is run twice.
+    Chunks not yet taken from ``task_chunks`` are left in the iterator.
+
+    Args:
+        task_chunks (iterable[list[tuple]]): Lists of
+            (index, filepath, cache_key, cached_data) per file.
+        params (dict): The batch parameters gathered by the UI.
+        timeout (float): Per-file time limit in seconds; 0 or None disables it.
+        on_result (callable): Called on this thread with each task and the
+                              tuple returned by _process_one.
+        workers (int): Number of worker processes (or threads) in the pool.
+
+    Returns:
+        list[tuple] or None: The submitted tasks still to be run after every
+        worker timed out, or None once every task from ``task_chunks`` has finished.
+    """
+    task_chunks = iter(task_chunks)
+    executor, worker_pids = _make_executor(workers)
+    futures = {}
+    order = {}
+    started = {}
+    not_done = set()
+    # Timed-out futures whose worker has not come back yet
+    stuck = set()
+    source_done = False
+    pool_hung = False
+    try:
+        while (not_done or not source_done) and not pool_hung:
+            if not source_done:
+                chunk = next(task_chunks, None)
+                if chunk is None:
+                    source_done = True
+                for task in chunk or ():
+                    future = executor.submit(_process_one, task[1], params, task[3])
+                    futures[future] = task
+                    order[future] = len(order)
+                    not_done.add(future)
+                if not not_done:
+                    continue
+
+            # Only block while there is nothing left to enumerate
+            poll = POLL_INTERVAL_S if source_done else 0
+            finished, not_done = wait(not_done, timeout=poll, return_when=FIRST_COMPLETED)
+            for future in finished:
+                on_result(futures[future], future.result())
+
+            # Workers take tasks in submission order, so only the oldest running
+            # futures, one per worker not held by a timed-out file, are executing;
+            # a process pool also marks the next queued task as running before a
+            # worker takes it.
+            now = time.monotonic()
+            stuck = {fut for fut in stuck if not fut.done()}
+            free = workers - len(stuck)
+            running = sorted((fut for fut in not_done if fut.running()), key=order.get)[:free]
+            for future in running:
+                if timeout and now - started.setdefault(future, now) > timeout:
+                    not_done.discard(future)
+                    stuck.add(future)
+                    on_result(futures[future], ('TIMEOUT', None, f"Timed out after {timeout:g} s, skipped.", None))
+            pool_hung = len(stuck) >= workers
+
+        # Keep anything that finished while we were checking for timeouts
+        for future in [fut for fut in not_done if fut.done() and not fut.cancelled()]:
+            not_done.discard(future)
+            on_result(futures[future], future.result())
+    finally:
+        # Waiting would block on the timed-out files
+        _shutdown_executor(executor, worker_pids, force=bool(stuck))
+
+    if not pool_hung:
+        return None
+    return [futures[future] for future in sorted(not_done, key=order.get)]
+
 
 class BatchRunner:
     """
@@ -27,56 +320,76 @@ class BatchRunner:
             input_folder = params['input_folder']
             output_name = params['output_name']
 
-            # Get a list of valid files to process
-            all_files = [f for f in os.listdir(input_folder) if os.path.isfile(os.path.join(input_folder, f))]
-            total_files = len(all_files)
-            if total_files == 0:
+            # Enumerate the folder in chunks; files are processed while the
+            # rest of the folder is still being listed.
+            file_chunks = _iter_files(input_folder, exclude=output_name)
+            first_chunk = next(file_chunks, None)
+            if first_chunk is None:
                 self.ui.log_message("No files found in the selected folder.", "warning")
                 self.ui.on_batch_complete()
                 return
 
-            all_results = []
-
-            for i, filename in enumerate(all_files):
-                filepath = os.path.join(input_folder, filename)
-                self.ui.log_message(f"Processing '{filename}' ({i + 1}/{total_files})...")
-                self.ui.set_progress((i + 1) / total_files)
-
-                try:
-                    # 1. Load Data
-                    angles, intensities = load_data(filepath)
-
-                    # 2. Background Subtraction (if enabled)
-                    if params['do_background']:
-                        intensities = intensities - bg_analysis.subtract_iterative_erosion(
-                            intensities, iterations=params['bg_iterations']
-                        )
-
-                    # 3. Peak Finding (if enabled)
-                    if params['do_peaks']:
-                        peaks_df = pk_analysis.find_all_peaks(
-                            angles, intensities, min_prominence=params.get('pk_prominence')
-                        )
-                        # For this example, we'll just record the strongest peak
-                        if not peaks_df.empty:
-                            strongest_peak = peaks_df.sort_values(by='intensity', ascending=False).iloc[0]
-                            all_results.append({
-                                'filename': filename,
-                                'strongest_peak_angle': strongest_peak['angle'],
-                                'strongest_peak_intensity': strongest_peak['intensity'],
-                                'strongest_peak_fwhm': strongest_peak['fwhm_angle']
-                            })
-                        else:
-                            all_results.append({'filename': filename, 'strongest_peak_angle': 'N/A'})
-
-                except (DataImportError, Exception) as e:
-                    self.ui.log_message(f"Could not process '{filename}'. Error: {e}", "error")
-                    all_results.append({'filename': filename, 'strongest_peak_angle': 'ERROR'})
-
-            # --- Save Results ---
-            results_df = pd.DataFrame(all_results)
             output_path = os.path.join(input_folder, output_name)
-            results_df.to_csv(output_path, index=False)
+            timeout = params.get('per_file_timeout_s', PER_FILE_TIMEOUT_S)
+            with open(output_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=RESULT_FIELDS)
+                writer.writeheader()
+
+                # Results arrive out of order; hold them only until the rows
+                # before them are written so the CSV keeps the file order.
+                pending = {}
+                next_row = 0
+                done = 0
+
+                def on_result(task, result):
+                    nonlocal next_row, done
+                    done += 1
+                    i, _, key, _ = task
+                    status, peak, error, loaded = result
+                    if loaded is not None and key is not None:
+                        _cache_put(key, loaded)
+                    if error is not None:
+                        self.ui.log_message(f"Could not process '{all_files[i][0]}'. Error: {error}", "error")
+                    else:
+                        self.ui.log_message(f"Processed '{all_files[i][0]}' ({done}/{len(all_files)}).")
+                    # The total grows until the scan finishes
+                    self.ui.set_progress(done / len(all_files))
+
+                    pending[i] = (status, peak)
+                    while next_row in pending:
+                        status, peak = pending.pop(next_row)
+                        # Files without a status (peak finding disabled) get no row
+                        if status:
+                            writer.writerow(_result_row(all_files[next_row][0], status, peak))
+                        next_row += 1
+                    if done % FLUSH_EVERY == 0:
+                        f.flush()
+
+                all_files = []
+
+                def iter_tasks():
+                    for chunk in itertools.chain([first_chunk], file_chunks):
+                        tasks = []
+                        for name, filepath in chunk:
+                            # Unchanged files parsed in an earlier batch are sent along
+                            # with the task so the worker skips reading them again.
+                            key = _cache_key(filepath)
+                            tasks.append((len(all_files), filepath, key, _cache_get(key) if key is not None else None))
+                            all_files.append((name, filepath))
+                        self.ui.log_message(f"Enumerated {len(all_files)} files so far...")
+                        yield tasks
+
+                # Once every worker is held by a timed-out file the pool is torn
+                # down, and the files that had not started are run on a fresh
+                # one, followed by the rest of the scan.
+                # A short first chunk is the whole folder, so a small batch
+                # does not start a worker per CPU.
+                workers = min(MAX_WORKERS, len(first_chunk))
+                task_chunks = iter_tasks()
+                tasks = []
+                while tasks is not None:
+                    tasks = _run_pool(itertools.chain([tasks], task_chunks), params, timeout, on_result, workers)
+
             self.ui.log_message(f"Results saved to '{output_path}'", "success")
 
         except Exception as e:
@@ -99,11 +412,28 @@ def launch_batch_processor(api):
     runner.ui = batch_window
 
 
+def _warm_up_kernels():
+    """
+    Runs the background kernel once on a tiny array.
+
+    When Numba is installed this compiles (or loads from the on-disk cache)
+    the erosion sweep up front, so the first batch does not stall, and it
+    leaves a cache entry for the worker processes to load.
+    """
+    try:
+        # The batch pipeline runs in float32; the interactive UI uses float64
+        for dtype in (np.float32, np.float64):
+            bg_analysis.subtract_iterative_erosion(np.zeros(16, dtype=dtype), iterations=1)
+    except Exception as e:
+        print(f"WARNING: Could not warm up analysis kernels: {e}")
+
+
 def register_plugin(api):
     """
     The required entry point for the plugin.
     oneXRD calls this function and passes the PluginAPI object.
     """
+    _warm_up_kernels()
     api.add_menu_item(
         menu_name="Tools",
         action_name="Batch Processing...",
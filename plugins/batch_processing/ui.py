@@ -1,3 +1,6 @@
+import collections
+import threading
+
 import customtkinter as ctk
 from tkinter import filedialog
 
@@ -9,10 +12,19 @@ class BatchWindow(ctk.CTkToplevel):
     and run a batch job.
     """
 
+    # Interval for coalescing log and progress updates, in milliseconds.
+    LOG_FLUSH_MS = 100
+
     def __init__(self, master, runner):
         super().__init__(master)
         self.runner = runner  # The logic controller for this plugin
 
+        # Log lines and the latest progress value waiting to be shown; they are
+        # applied together by _flush_log at most every LOG_FLUSH_MS.
+        self._log_buf = collections.deque()
+        self._pending_progress = None
+        self._flush_scheduled = False
+
         self.title("Batch Processing")
         self.geometry("600x700")
         self.grid_columnconfigure(0, weight=1)
@@ -53,6 +65,10 @@ class BatchWindow(ctk.CTkToplevel):
         self.pk_prom_entry = ctk.CTkEntry(params_frame, placeholder_text="Min Prominence")
         self.pk_prom_entry.grid(row=2, column=1)
 
+        ctk.CTkLabel(params_frame, text="Timeout per File (s)").grid(row=3, column=0, padx=10)
+        self.timeout_entry = ctk.CTkEntry(params_frame, placeholder_text="0 = no limit, blank = default")
+        self.timeout_entry.grid(row=3, column=1)
+
         # --- Output Frame ---
         output_frame = ctk.CTkFrame(self)
         output_frame.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
@@ -102,8 +118,16 @@ class BatchWindow(ctk.CTkToplevel):
             'do_background': self.bg_var.get() == "on",
             'bg_iterations': int(self.bg_iter_entry.get() or 50),
             'do_peaks': self.pk_var.get() == "on",
-            'pk_prominence': float(self.pk_prom_entry.get() or 0)
+            'pk_prominence': float(self.pk_prom_entry.get() or 0),
         }
+        # Left out when blank so the runner applies its PER_FILE_TIMEOUT_S default
+        timeout_text = self.timeout_entry.get()
+        if timeout_text:
+            params['per_file_timeout_s'] = float(timeout_text)
+        if params['bg_iterations'] < 0:
+            raise ValueError("Background iterations must be zero or a positive integer.")
+        if params.get('per_file_timeout_s', 0) < 0:
+            raise ValueError("Timeout per file must be zero (no limit) or a positive number of seconds.")
         return params
 
     def _run_clicked(self):
@@ -117,25 +141,53 @@ class BatchWindow(ctk.CTkToplevel):
             self.log_textbox.configure(state="normal")
             self.log_textbox.delete("1.0", "end")
             self.log_textbox.configure(state="disabled")
-            self.runner.run_batch(params)
+            # Run off the Tk main thread so the window keeps redrawing during the batch
+            threading.Thread(target=self.runner.run_batch, args=(params,), daemon=True).start()
         except (ValueError, TypeError) as e:
             self.log_message(f"ERROR: Invalid parameter. Please check your inputs. Details: {e}", "error")
 
+    # The public feedback methods below may be called from the runner's worker
+    # thread. They only buffer the update (deque appends are atomic) and make
+    # sure a flush is scheduled on the Tk thread.
+
     def log_message(self, message, level="info"):
         """Appends a message to the log box."""
-        self.log_textbox.configure(state="normal")
         # In a real app, we might add color-coding for levels
-        self.log_textbox.insert("end", f"[{level.upper()}] {message}\n")
-        self.log_textbox.see("end")  # Auto-scroll
-        self.log_textbox.configure(state="disabled")
+        self._log_buf.append(f"[{level.upper()}] {message}\n")
+        self._schedule_flush()
 
     def set_progress(self, value):
         """Sets the progress bar value (0.0 to 1.0)."""
-        self.progress_bar.set(value)
+        self._pending_progress = value
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        """Schedules _flush_log unless a flush is already pending."""
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.after(self.LOG_FLUSH_MS, self._flush_log)
+
+    def _flush_log(self):
+        """Writes all buffered log lines in one insert and applies the latest progress (Tk thread only)."""
+        # Clear the flag before draining so updates arriving meanwhile schedule a new flush
+        self._flush_scheduled = False
+
+        progress, self._pending_progress = self._pending_progress, None
+        if progress is not None:
+            self.progress_bar.set(progress)
+
+        lines = []
+        while self._log_buf:
+            lines.append(self._log_buf.popleft())
+        if lines:
+            self.log_textbox.configure(state="normal")
+            self.log_textbox.insert("end", "".join(lines))
+            self.log_textbox.see("end")  # Auto-scroll
+            self.log_textbox.configure(state="disabled")
 
     def on_batch_complete(self):
         """Called by the runner when the batch is finished."""
-        self.run_button.configure(state="normal")
+        self.after(0, lambda: self.run_button.configure(state="normal"))
         self.log_message("Batch process complete!", "success")
 
 
@@ -168,7 +220,6 @@ if __name__ == '__main__':
                 self.ui.set_progress(progress)
                 if i < total_files:
                     self.ui.log_message(f"Processing file {i + 1} of {total_files}...")
-                self.app.update_idletasks()  # Crucial for UI updates
                 time.sleep(0.3)  # Simulate work
             self.ui.on_batch_complete()
 
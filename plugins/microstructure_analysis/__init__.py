@@ -24,6 +24,21 @@ class MicrostructureRunner:
             self.api.log(f"Scherrer calculation failed: {e}", level='error')
             self.ui.show_scherrer_result(f"Error: {e}")
 
+    def run_scherrer_all(self):
+        try:
+            exp_data = self.api.get_experimental_data()
+            sizes = an.calculate_scherrer_batch(
+                exp_data.peaks_df['fwhm_angle'].to_numpy(),
+                exp_data.peaks_df['angle'].to_numpy()
+            )
+            self.ui.show_scherrer_result(
+                f"Result ({len(sizes)} peaks): mean {sizes.mean():.2f} Å, "
+                f"range {sizes.min():.2f}–{sizes.max():.2f} Å"
+            )
+        except Exception as e:
+            self.api.log(f"Scherrer calculation failed: {e}", level='error')
+            self.ui.show_scherrer_result(f"Error: {e}")
+
     def run_williamson_hall(self):
         try:
             exp_data = self.api.get_experimental_data()
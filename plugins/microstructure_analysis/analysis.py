@@ -1,6 +1,5 @@
 import numpy as np
 import pandas as pd
-from scipy.stats import linregress
 
 
 # =============================================================================
@@ -41,6 +40,33 @@ def calculate_scherrer_size(peak_fwhm, peak_angle, wavelength=1.5406, shape_fact
     return crystallite_size
 
 
+def calculate_scherrer_batch(fwhm_deg_arr, angle_deg_arr, wavelength=1.5406, shape_factor_K=0.9):
+    """
+    Calculates crystallite sizes using the Scherrer equation for many peaks at once.
+
+    Vectorized counterpart of calculate_scherrer_size: K * lambda is computed
+    once and the trigonometry runs on whole arrays.
+
+    Args:
+        fwhm_deg_arr (array-like): The FWHM of each peak in degrees.
+        angle_deg_arr (array-like): The 2-theta position of each peak in degrees.
+        wavelength (float, optional): The X-ray wavelength in Angstroms. Defaults to 1.5406 (Cu K-alpha).
+        shape_factor_K (float, optional): The Scherrer shape factor. Defaults to 0.9.
+
+    Returns:
+        np.ndarray: The calculated crystallite size of each peak in Angstroms.
+    """
+    fwhm_deg = np.asarray(fwhm_deg_arr, dtype=np.float64)
+    angle_deg = np.asarray(angle_deg_arr, dtype=np.float64)
+    if fwhm_deg.size == 0:
+        raise MicrostructureError("Scherrer analysis requires at least 1 peak.")
+    if np.any(fwhm_deg <= 0):
+        raise MicrostructureError("FWHM must be a positive value.")
+
+    k_lambda = shape_factor_K * wavelength
+    return k_lambda / (np.deg2rad(fwhm_deg) * np.cos(np.deg2rad(0.5 * angle_deg)))
+
+
 def calculate_williamson_hall(peaks_df, wavelength=1.5406, shape_factor_K=0.9):
     """
     Performs a Williamson-Hall analysis on a set of peaks.
@@ -59,17 +85,21 @@ def calculate_williamson_hall(peaks_df, wavelength=1.5406, shape_factor_K=0.9):
     if len(peaks_df) < 2:
         raise MicrostructureError("Williamson-Hall analysis requires at least 2 peaks.")
 
-    fwhm_rad = np.deg2rad(peaks_df['fwhm_angle'])
-    theta_rad = np.deg2rad(peaks_df['angle'] / 2.0)
+    # Work on plain float arrays rather than pandas Series
+    fwhm_deg = peaks_df['fwhm_angle'].to_numpy(dtype=np.float64, copy=False)
+    angle_deg = peaks_df['angle'].to_numpy(dtype=np.float64, copy=False)
+
+    fwhm_rad = np.deg2rad(fwhm_deg)
+    theta_rad = np.deg2rad(0.5 * angle_deg)
 
     # Calculate W-H plot coordinates
     # y = beta * cos(theta)
     # x = 4 * sin(theta)
     y_data = fwhm_rad * np.cos(theta_rad)
-    x_data = 4 * np.sin(theta_rad)
+    x_data = 4.0 * np.sin(theta_rad)
 
     # Perform linear regression: y = m*x + c
-    slope, intercept, r_value, _, _ = linregress(x_data, y_data)
+    slope, intercept, r_squared = _fit_line(x_data, y_data)
 
     # Extract physical parameters
     # Slope = strain (epsilon)
@@ -90,10 +120,42 @@ def calculate_williamson_hall(peaks_df, wavelength=1.5406, shape_factor_K=0.9):
         'fit_line_y': fit_line_y,
         'crystallite_size_A': crystallite_size,
         'strain': strain,
-        'r_squared': r_value ** 2
+        'r_squared': r_squared
     }
 
 
+def _fit_line(x, y):
+    """
+    Ordinary least-squares fit of y = m*x + c using the two-pass formulas.
+
+    The W-H fit only needs the slope, intercept and R², so this avoids the
+    extra statistics and input checks of scipy.stats.linregress.
+
+    Args:
+        x (np.ndarray): The x values.
+        y (np.ndarray): The y values.
+
+    Returns:
+        tuple[float, float, float]: (slope, intercept, r_squared).
+    """
+    x_mean = x.mean()
+    y_mean = y.mean()
+    dx = x - x_mean
+    dy = y - y_mean
+
+    ss_xx = np.dot(dx, dx)
+    if ss_xx == 0:
+        raise MicrostructureError("Cannot fit a line: all peaks have the same angle.")
+    ss_xy = np.dot(dx, dy)
+    ss_yy = np.dot(dy, dy)
+
+    slope = ss_xy / ss_xx
+    intercept = y_mean - slope * x_mean
+    # As with linregress, R² is undefined (NaN) when y has no variance
+    r_squared = (ss_xy * ss_xy) / (ss_xx * ss_yy) if ss_yy > 0 else np.nan
+    return slope, intercept, r_squared
+
+
 # =============================================================================
 # Standalone Test Block
 # =============================================================================
@@ -114,6 +176,17 @@ if __name__ == '__main__':
     except MicrostructureError as e:
         print(f"  --> FAILED: {e}")
 
+    # --- Test 1b: Vectorized Scherrer calculation ---
+    print("\n[Test 1b] Vectorized Scherrer Calculation")
+    try:
+        sizes = calculate_scherrer_batch([0.5, 0.25], [30.0, 60.0])
+        expected = [calculate_scherrer_size(0.5, 30.0), calculate_scherrer_size(0.25, 60.0)]
+        print(f"  Calculated sizes: {np.round(sizes, 2)} Å")
+        assert np.allclose(sizes, expected)
+        print("  --> SUCCESS")
+    except MicrostructureError as e:
+        print(f"  --> FAILED: {e}")
+
     # --- Test 2: Williamson-Hall calculation ---
     print("\n[Test 2] Williamson-Hall Calculation")
     try:
@@ -33,12 +33,16 @@ class MicrostructureWindow(ctk.CTkToplevel):
 
         ctk.CTkLabel(tab, text="Scherrer Equation: Crystallite Size", font=ctk.CTkFont(weight="bold")).pack(pady=10)
 
-        peak_options = [f"{i}: Angle={row['angle']:.2f}, FWHM={row['fwhm_angle']:.4f}" for i, row in
-                        peaks_df.iterrows()]
+        # Format from plain arrays; iterrows() would build a Series per peak.
+        # The leading number is the row position, as used by run_scherrer's iloc.
+        angles = peaks_df['angle'].to_numpy()
+        fwhms = peaks_df['fwhm_angle'].to_numpy()
+        peak_options = [f"{i}: Angle={a:.2f}, FWHM={w:.4f}" for i, (a, w) in enumerate(zip(angles, fwhms))]
         self.scherrer_peak_combo = ctk.CTkComboBox(tab, values=peak_options)
         self.scherrer_peak_combo.pack(pady=10, padx=20, fill="x")
 
         ctk.CTkButton(tab, text="Calculate Size", command=self._on_scherrer_calculate).pack(pady=10)
+        ctk.CTkButton(tab, text="Calculate for All Peaks", command=self._on_scherrer_calculate_all).pack(pady=(0, 10))
 
         self.scherrer_result_label = ctk.CTkLabel(tab, text="Result: -", font=ctk.CTkFont(size=14))
         self.scherrer_result_label.pack(pady=10)
@@ -80,6 +84,9 @@ class MicrostructureWindow(ctk.CTkToplevel):
         peak_index = int(selected.split(':')[0])
         self.runner.run_scherrer(peak_index)
 
+    def _on_scherrer_calculate_all(self):
+        self.runner.run_scherrer_all()
+
     def _on_wh_calculate(self):
         self.runner.run_williamson_hall()
 
@@ -111,6 +118,10 @@ if __name__ == '__main__':
             print(f"Runner: Calculating Scherrer for peak index {peak_index}")
             app.plugin_window.show_scherrer_result("Result: 150.25 Å")
 
+        def run_scherrer_all(self):
+            print("Runner: Calculating Scherrer for all peaks")
+            app.plugin_window.show_scherrer_result("Result (3 peaks): mean 150.25 Å, range 120.10–180.40 Å")
+
         def run_williamson_hall(self):
             print("Runner: Calculating W-H plot")
             # Fake plot data
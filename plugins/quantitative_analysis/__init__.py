@@ -1,4 +1,3 @@
-import matplotlib.pyplot as plt  # Import for color mapping
 from tkinter import messagebox
 from .ui import QpaWindow
 from .analysis import calculate_rir_quantification, QpaError
@@ -20,8 +19,8 @@ class QpaRunner:
             percentages = calculate_rir_quantification(phase_data)
 
             # Combine results into a single structure for the UI
-            for i, p_data in enumerate(phase_data):
-                p_data['wt_percent'] = percentages[i]
+            for p_data, wt_percent in zip(phase_data, percentages):
+                p_data['wt_percent'] = wt_percent
 
             self.ui.update_results(phase_data)
             self.api.log("QPA calculation complete.", level="info")
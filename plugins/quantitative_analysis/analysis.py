@@ -1,6 +1,22 @@
+from functools import lru_cache
+
 import numpy as np
 import pandas as pd
 
+# Numba is optional. When installed, the weight-percent calculation for long
+# phase lists runs as one compiled kernel; otherwise the NumPy expressions are used.
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# Fewest phases for which the compiled kernel is used. Typical analyses have a
+# handful of phases, where NumPy is fast enough and the first call would only
+# pay for compiling (or loading) the kernel on the UI thread.
+NUMBA_MIN_PHASES = 1000
+
 class QpaError(Exception):
     """Custom exception for Quantitative Phase Analysis errors."""
     pass
@@ -8,20 +24,60 @@ class QpaError(Exception):
 def calculate_rir_quantification(phase_data):
     """
     Calculates the weight percent of each phase using the RIR method.
+
+    Returns:
+        np.ndarray: The weight percents, in the order of ``phase_data``.
+                    The array is shared with the memoization cache and is
+                    read-only.
     """
     if not phase_data:
-        return []
-    i_over_rir_sum = 0
-    i_over_rir_values = []
-    for phase in phase_data:
-        intensity = phase.get('intensity', 0)
-        rir = phase.get('rir', 0)
-        if rir <= 0:
-            raise QpaError(f"RIR value for a phase must be greater than 0.")
-        value = intensity / rir
-        i_over_rir_values.append(value)
-        i_over_rir_sum += value
-    if i_over_rir_sum == 0:
-        return [0.0] * len(phase_data)
-    weight_percents = [(val / i_over_rir_sum) * 100.0 for val in i_over_rir_values]
-    return weight_percents
\ No newline at end of file
+        return np.empty(0)
+    pairs = tuple((float(phase.get('intensity', 0)), float(phase.get('rir', 0))) for phase in phase_data)
+    return _rir_core(pairs)
+
+@lru_cache(maxsize=128)
+def _rir_core(pairs):
+    """
+    Computes the weight percents for a tuple of (intensity, rir) pairs.
+    Results are memoized, so recalculating an unchanged phase list is free.
+    """
+    arr = np.array(pairs, dtype=np.float64)
+    # NaN fails every comparison, so it has to be rejected explicitly along with inf
+    bad = ~(np.isfinite(arr[:, 1]) & (arr[:, 1] > 0))
+    if bad.any():
+        positions = ", ".join(str(i + 1) for i in np.flatnonzero(bad))
+        raise QpaError(f"RIR value for a phase must be a finite number greater than 0 (phase {positions}).")
+    if NUMBA_AVAILABLE and len(pairs) >= NUMBA_MIN_PHASES:
+        weight_percents = _rir_core_numba(arr[:, 0], arr[:, 1])
+    else:
+        i_over_rir_values = arr[:, 0] / arr[:, 1]
+        i_over_rir_sum = i_over_rir_values.sum()
+        if i_over_rir_sum == 0:
+            weight_percents = np.zeros(len(pairs))
+        else:
+            weight_percents = i_over_rir_values * (100.0 / i_over_rir_sum)
+    # Cached results are handed out as-is, so callers must not modify them
+    weight_percents.flags.writeable = False
+    return weight_percents
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _rir_core_numba(intensity, rir):
+        """
+        Compiled equivalent of the NumPy weight-percent calculation in
+        _rir_core: the I/RIR ratios are summed as they are computed and then
+        scaled in place, without separate temporaries.
+        """
+        n = intensity.shape[0]
+        values = np.empty(n)
+        total = 0.0
+        for i in range(n):
+            v = intensity[i] / rir[i]
+            values[i] = v
+            total += v
+        if total == 0.0:
+            return np.zeros(n)
+        scale = 100.0 / total
+        for i in range(n):
+            values[i] *= scale
+        return values
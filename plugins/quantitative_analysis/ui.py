@@ -1,9 +1,68 @@
+import os
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
 import customtkinter as ctk
 from tkinter import ttk, filedialog
+from matplotlib.collections import LineCollection
 from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt  # Import for color mapping
 
+# Roughly the most points worth drawing across a plot that is at most a couple of thousand pixels wide.
+MAX_PLOT_POINTS = 2000
+
+
+def _decimate_for_plot(x, y, max_points=MAX_PLOT_POINTS):
+    """
+    Reduces a pattern to about ``max_points`` points for display. The minimum
+    and maximum of each bucket are kept, so narrow peaks survive, unlike a
+    plain stride.
+
+    Args:
+        x (np.ndarray): The x values (e.g. 2-theta angles).
+        y (np.ndarray): The y values (e.g. intensities).
+        max_points (int): The approximate number of points to keep.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The decimated x and y arrays.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = len(y)
+    if n <= max_points:
+        return x, y
+
+    # Two points (min and max) per bucket; the last bucket may be partial
+    size = -(-n // (max_points // 2))
+    full = n // size
+    offsets = np.arange(full) * size
+    buckets = y[:full * size].reshape(full, size)
+    parts = [[0, n - 1], offsets + buckets.argmin(axis=1), offsets + buckets.argmax(axis=1)]
+    if full * size < n:
+        tail = y[full * size:]
+        parts.append([full * size + tail.argmin(), full * size + tail.argmax()])
+    idx = np.unique(np.concatenate(parts))
+    return x[idx], y[idx]
+
+
+# ttk styles are global to the Tk interpreter, so they only need configuring for the first window.
+_STYLES_DONE = False
+
+
+def _configure_styles_once(root):
+    """Applies the dark Treeview styles the first time a QPA window is opened."""
+    global _STYLES_DONE
+    if _STYLES_DONE:
+        return
+    style = ttk.Style(root)
+    style.theme_use("default")
+    style.configure("Treeview", background="#2B2B2B", foreground="white", fieldbackground="#2B2B2B", rowheight=25)
+    style.configure("Treeview.Heading", background="#565B5E", foreground="white", font=('Arial', 10, 'bold'))
+    _STYLES_DONE = True
+
 
 class QpaWindow(ctk.CTkToplevel):
     """The redesigned UI window for QPA with integrated visualizations."""
@@ -13,6 +72,8 @@ class QpaWindow(ctk.CTkToplevel):
         self.runner = runner
         self.experimental_data = experimental_data
         self.reference_patterns = list(runner.api.get_project().reference_data.values())
+        # Inputs of the results currently shown, used to skip identical recalculations
+        self._last_results_key = None
 
         self.title("Quantitative Phase Analysis (RIR)")
         self.geometry("1100x700")
@@ -20,6 +81,7 @@ class QpaWindow(ctk.CTkToplevel):
         self.grid_rowconfigure(0, weight=1)
         self.grab_set()
 
+        _configure_styles_once(self)
         self._create_widgets()
         self._populate_from_project()
 
@@ -68,7 +130,13 @@ class QpaWindow(ctk.CTkToplevel):
                                                                                                                 padx=10,
                                                                                                                 sticky="w")
         ctk.CTkLabel(self.inspector_frame, text="Assigned Peak:").grid(row=1, column=0, padx=10, pady=10, sticky="w")
-        peak_options = [f"{idx}: {row['angle']:.3f}°" for idx, row in self.experimental_data.peaks_df.iterrows()]
+        # Positions match the iloc lookup in _on_update_clicked
+        peak_angles = [f"{angle:.3f}" for angle in self.experimental_data.peaks_df['angle'].to_numpy()]
+        peak_options = [f"{i}: {angle}°" for i, angle in enumerate(peak_angles)]
+        # Maps the angle string stored in the tree to its combo option; the first peak wins on duplicates
+        self._peak_lookup = {}
+        for angle, option in zip(peak_angles, peak_options):
+            self._peak_lookup.setdefault(angle, option)
         self.peak_combo = ctk.CTkComboBox(self.inspector_frame, values=["N/A"] + peak_options, width=250);
         self.peak_combo.grid(row=1, column=1, padx=10, sticky="ew")
         ctk.CTkLabel(self.inspector_frame, text="RIR Value:").grid(row=2, column=0, padx=10, pady=10, sticky="w")
@@ -90,69 +158,110 @@ class QpaWindow(ctk.CTkToplevel):
                                                                                             columnspan=2, padx=10,
                                                                                             pady=10, sticky="w")
 
-        self.pie_fig = Figure(figsize=(5, 4), dpi=100, facecolor='#2B2B2B')
+        # Constrained layout is solved as part of each draw, so the updates need no tight_layout() pass
+        self.pie_fig = Figure(figsize=(5, 4), dpi=100, facecolor='#2B2B2B', constrained_layout=True)
         self.pie_ax = self.pie_fig.add_subplot(111)
         self.pie_canvas = FigureCanvasTkAgg(self.pie_fig, tab)
         self.pie_canvas.get_tk_widget().grid(row=1, column=0, padx=10, pady=5, sticky="nsew")
 
-        self.peak_fig = Figure(figsize=(5, 4), dpi=100, facecolor='#2B2B2B')
+        self.peak_fig = Figure(figsize=(5, 4), dpi=100, facecolor='#2B2B2B', constrained_layout=True)
         self.peak_ax = self.peak_fig.add_subplot(111)
         self.peak_canvas = FigureCanvasTkAgg(self.peak_fig, tab)
         self.peak_canvas.get_tk_widget().grid(row=1, column=1, padx=10, pady=5, sticky="nsew")
 
+        # Looked up once; plt.cm.get_cmap was deprecated and later removed from matplotlib
+        self._tab10 = plt.get_cmap('tab10')
+
+        # The pie is rebuilt only when the set of phases changes
+        self._pie_wedges = None
+        self._pie_names = None
+
+        # The experimental pattern and the axes styling never change, so they are set up once;
+        # updates only move the peak markers and rebuild the legend.
+        plot_angles, plot_intensities = _decimate_for_plot(self.experimental_data.processed_angles,
+                                                           self.experimental_data.processed_intensities)
+        self._exp_line, = self.peak_ax.plot(plot_angles, plot_intensities, label='Experimental Data', color='gray')
+        # Assigned peaks are one collection of full-height lines (x in data units, y in axes units, like axvline)
+        self._peak_lines = LineCollection([], linestyles='--', transform=self.peak_ax.get_xaxis_transform())
+        self.peak_ax.add_collection(self._peak_lines, autolim=False)
+        self.peak_ax.set_title("Assigned Experimental Peaks", color='white')
+        self.peak_ax.set_xlabel("Angle (2θ)", color='white');
+        self.peak_ax.set_ylabel("Intensity", color='white')
+        self.peak_ax.tick_params(axis='x', colors='white');
+        self.peak_ax.tick_params(axis='y', colors='white')
+        self.peak_ax.grid(True, alpha=0.5)
+        self.peak_ax.set_facecolor('#3B3B3B')
+
     def update_results(self, phase_data):
         # --- FIX: Programmatically switch to the results tab ---
         self.tab_view.set("Results & Visualization")
 
-        names = [p['name'] for p in phase_data]
-        percents = [p['wt_percent'] for p in phase_data]
+        names, percents = zip(*map(itemgetter('name', 'wt_percent'), phase_data)) if phase_data else ((), ())
 
         self._update_pie_chart(names, percents)
         self._update_peak_plot(phase_data)
+        self._last_results_key = self._results_key(phase_data)
+
+    @staticmethod
+    def _results_key(phase_data):
+        """Returns a hashable summary of the calculation inputs."""
+        return tuple((p['name'], p['angle'], p['intensity'], p['rir']) for p in phase_data)
 
     def _update_pie_chart(self, names, percents):
-        self.pie_ax.clear()
-        self.pie_ax.pie(percents, labels=names, autopct='%1.1f%%', startangle=90,
-                        textprops={'color': "w"},
-                        wedgeprops=dict(width=0.4, edgecolor='w'))
-        self.pie_ax.set_title("Phase Composition (Wt. %)", color='white')
-        self.pie_fig.tight_layout()
-        self.pie_canvas.draw()
+        if self._pie_wedges is not None and tuple(names) == self._pie_names:
+            # Same phases as before: move the existing wedges and labels to the new fractions
+            fracs = np.asarray(percents, dtype=float)
+            fracs = fracs / fracs.sum()
+            theta2 = 90.0 + 360.0 * np.cumsum(fracs)
+            theta1 = theta2 - 360.0 * fracs
+            mid = np.deg2rad((theta1 + theta2) / 2)
+            for wedge, label, pct_text, t1, t2, frac, x, y in zip(self._pie_wedges, self._pie_labels,
+                                                                  self._pie_pct_texts, theta1, theta2, fracs,
+                                                                  np.cos(mid), np.sin(mid)):
+                wedge.set_theta1(t1);
+                wedge.set_theta2(t2)
+                label.set_position((1.1 * x, 1.1 * y));
+                label.set_horizontalalignment('left' if x > 0 else 'right')
+                pct_text.set_position((0.6 * x, 0.6 * y));
+                pct_text.set_text(f"{100.0 * frac:1.1f}%")
+        else:
+            self.pie_ax.clear()
+            self._pie_wedges, self._pie_labels, self._pie_pct_texts = self.pie_ax.pie(
+                percents, labels=names, autopct='%1.1f%%', startangle=90,
+                textprops={'color': "w"},
+                wedgeprops=dict(width=0.4, edgecolor='w'))
+            self._pie_names = tuple(names)
+            self.pie_ax.set_title("Phase Composition (Wt. %)", color='white')
+        self.pie_canvas.draw_idle()
 
     def _update_peak_plot(self, phase_data):
-        self.peak_ax.clear()
-        self.peak_ax.plot(self.experimental_data.processed_angles, self.experimental_data.processed_intensities,
-                          label='Experimental Data', color='gray')
-
-        colors = plt.cm.get_cmap('tab10', len(phase_data))
-        for i, phase in enumerate(phase_data):
-            self.peak_ax.axvline(phase['angle'], color=colors(i), linestyle='--', label=f"{phase['name']} peak")
+        angles = np.fromiter((phase['angle'] for phase in phase_data), dtype=float, count=len(phase_data))
+        segments = np.empty((len(angles), 2, 2))
+        segments[:, :, 0] = angles[:, None]
+        segments[:, 0, 1] = 0.0
+        segments[:, 1, 1] = 1.0
+        phase_colors = self._tab10(np.arange(len(angles)) % 10)
+        self._peak_lines.set_segments(segments)
+        self._peak_lines.set_color(phase_colors)
 
-        self.peak_ax.set_title("Assigned Experimental Peaks", color='white')
-        self.peak_ax.set_xlabel("Angle (2θ)", color='white');
-        self.peak_ax.set_ylabel("Intensity", color='white')
-        self.peak_ax.tick_params(axis='x', colors='white');
-        self.peak_ax.tick_params(axis='y', colors='white')
-        self.peak_ax.legend();
-        self.peak_ax.grid(True, alpha=0.5)
-        self.peak_ax.set_facecolor('#3B3B3B')
-        self.peak_fig.tight_layout()
-        self.peak_canvas.draw()
+        handles = [self._exp_line] + [Line2D([], [], color=color, linestyle='--', label=f"{phase['name']} peak")
+                                      for phase, color in zip(phase_data, phase_colors)]
+        self.peak_ax.legend(handles=handles);
+        self.peak_canvas.draw_idle()
 
     # --- All other helper methods (_populate_from_project, _create_treeview, _on_add_phase, etc.)
     # --- are identical to the previous 'optimized' version and do not need to be changed.
     def _populate_from_project(self):
+        # Hide the columns during the bulk insert so the tree lays its rows out once
+        self.tree.configure(displaycolumns=())
         for ref_data in self.reference_patterns:
             phase_name = ref_data.display_name.replace(" (Ref)", "")
             self.tree.insert('', 'end', values=(phase_name, 'N/A', 'N/A', '1.00', 'N/A'))
+        self.tree.configure(displaycolumns='#all')
         if self.reference_patterns: self.runner.api.log(
             f"Pre-loaded {len(self.reference_patterns)} phases from main project.", "info")
 
     def _create_treeview(self, parent):
-        style = ttk.Style(self);
-        style.theme_use("default")
-        style.configure("Treeview", background="#2B2B2B", foreground="white", fieldbackground="#2B2B2B", rowheight=25)
-        style.configure("Treeview.Heading", background="#565B5E", foreground="white", font=('Arial', 10, 'bold'))
         columns = ('phase', 'peak_angle', 'intensity', 'rir', 'wt_percent')
         tree = ttk.Treeview(parent, columns=columns, show='headings')
         tree.heading('phase', text='Phase');
@@ -179,9 +288,7 @@ class QpaWindow(ctk.CTkToplevel):
         self._set_inspector_state("normal");
         values = self.tree.item(selected_item)['values']
         peak_angle = values[1];
-        combo_val = "N/A"
-        for option in self.peak_combo.cget("values"):
-            if str(peak_angle) in option: combo_val = option; break
+        combo_val = self._peak_lookup.get(str(peak_angle), "N/A")
         self.peak_combo.set(combo_val);
         self.rir_entry.delete(0, "end");
         self.rir_entry.insert(0, values[3])
@@ -208,8 +315,8 @@ class QpaWindow(ctk.CTkToplevel):
     def _on_add_phase(self):
         filepath = filedialog.askopenfilename(title="Select CIF File", filetypes=[("CIF Files", "*.cif")]);
         if not filepath: return
-        import os;
         phase_name = os.path.basename(filepath)
+        # The RIR method only needs the phase name, so the file is not parsed
         self.tree.insert('', 'end', values=(phase_name, 'N/A', 'N/A', '1.00', 'N/A'))
 
     def _on_remove_phase(self):
@@ -217,15 +324,23 @@ class QpaWindow(ctk.CTkToplevel):
         if selected_item: self.tree.delete(selected_item)
 
     def _on_calculate(self):
-        phase_data = [];
         items = self.tree.get_children()
-        for item in items:
-            values = self.tree.item(item)['values']
-            try:
-                phase_data.append({'name': values[0], 'angle': float(values[1]), 'intensity': float(values[2]),
-                                   'rir': float(values[3])})
-            except (ValueError, TypeError):
-                self.runner.api.log(f"Invalid data for phase '{values[0]}'. Please assign a peak and valid RIR.",
-                                    level="error");
-                return
+        tree_item = self.tree.item
+        rows = [tree_item(item)['values'] for item in items]
+        # Parse the angle, intensity and RIR columns of all rows at once; anything
+        # that is not a number (e.g. 'N/A' for an unassigned peak) becomes NaN
+        numeric = pd.DataFrame([values[1:4] for values in rows], columns=['angle', 'intensity', 'rir'])
+        numeric = numeric.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        invalid = np.isnan(numeric).any(axis=1)
+        if invalid.any():
+            values = rows[int(invalid.argmax())]
+            self.runner.api.log(f"Invalid data for phase '{values[0]}'. Please assign a peak and valid RIR.",
+                                level="error");
+            return
+        phase_data = [{'name': values[0], 'angle': angle, 'intensity': intensity, 'rir': rir}
+                      for values, (angle, intensity, rir) in zip(rows, numeric.tolist())]
+        # The table is unchanged since the last calculation, so the results shown are still valid
+        if self._results_key(phase_data) == self._last_results_key:
+            self.tab_view.set("Results & Visualization")
+            return
         self.runner.run_calculation(phase_data)
\ No newline at end of file
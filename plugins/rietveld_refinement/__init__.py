@@ -7,8 +7,8 @@
 from tkinter import messagebox
 
 # Import the UI and Engine components of our plugin
-from .ui import RietveldWindow
-from .engine import RietveldEngine, RietveldError
+from .ui import RietveldWindow, Gsas2InstallWindow
+from .engine import RietveldEngine, RietveldError, GSASII_AVAILABLE
 
 
 def launch_refinement(api):
@@ -30,6 +30,15 @@ def launch_refinement(api):
     except RietveldError as e:
         # 3. If the engine failed to initialize, show an error to the user.
         api.log(f"Failed to launch Rietveld plugin: {e}", level="error")
+        if not GSASII_AVAILABLE:
+            # Offer to run the installer next to the application instead of from a terminal
+            if messagebox.askyesno(
+                    "GSAS-II Not Found",
+                    "The Rietveld refinement tool needs GSAS-II, which was not found.\n\n"
+                    "Download and install GSAS-II now? This may take several minutes.",
+                    parent=main_window):
+                Gsas2InstallWindow(main_window)
+            return
         messagebox.showerror(
             "Rietveld Plugin Error",
             f"Could not start the Rietveld refinement tool.\n\n"
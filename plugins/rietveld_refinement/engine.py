@@ -1,3 +1,4 @@
+import hashlib
 import os
 import shutil
 import tempfile
@@ -14,6 +15,45 @@ except ImportError:
     GSASII_AVAILABLE = False
 
 
+# Projects saved right after setup_refinement(), keyed by their inputs, so
+# refining the same data and CIF again skips importing them into GSAS-II.
+GPX_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'onexrd', 'rietveld')
+# Most cached projects kept; the least recently used are removed beyond this.
+GPX_CACHE_MAX_ENTRIES = 32
+
+
+def _setup_cache_path(exp_data_path, cif_file_path, phasename):
+    """
+    Returns the cache file for a setup, keyed by both input files (path,
+    modification time and size) and the phase name.
+    """
+    parts = [phasename]
+    for path in (exp_data_path, cif_file_path):
+        st = os.stat(path)
+        parts.append(f"{os.path.abspath(path)}:{st.st_mtime_ns}:{st.st_size}")
+    key = hashlib.sha1("|".join(parts).encode('utf-8')).hexdigest()
+    return os.path.join(GPX_CACHE_DIR, key + '.gpx')
+
+
+def _prune_setup_cache(max_entries=GPX_CACHE_MAX_ENTRIES):
+    """
+    Removes the least recently used projects from GPX_CACHE_DIR until at most
+    ``max_entries`` are left. A cache hit refreshes the file's modification
+    time, so that time orders the entries by last use.
+    """
+    entries = []
+    with os.scandir(GPX_CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith('.gpx') and entry.is_file():
+                entries.append((entry.stat().st_mtime, entry.path))
+    entries.sort()
+    for _, path in entries[:max(len(entries) - max_entries, 0)]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Removed by another process, or in use on Windows
+
+
 # =============================================================================
 # Custom Exception
 # =============================================================================
@@ -27,7 +67,12 @@ class RietveldError(Exception):
 # =============================================================================
 
 class RietveldEngine:
-    """A wrapper for performing Rietveld refinement using GSAS-II."""
+    """
+    A wrapper for performing Rietveld refinement using GSAS-II.
+
+    The engine can be used as a context manager; its temporary project
+    directory is removed on exit.
+    """
 
     def __init__(self, api):
         """
@@ -39,20 +84,50 @@ class RietveldEngine:
                 "GSAS-II is not installed or not found in the Python path. Please install it to use this feature.")
         self.api = api
         self.gpx = None
-        self.temp_dir = tempfile.mkdtemp()
+        # Removed by cleanup(), on leaving a `with` block, or at the latest when
+        # the engine is garbage collected, so a crashed caller does not leak it.
+        self._tmp = tempfile.TemporaryDirectory(prefix='rietveld_')
+        self.temp_dir = self._tmp.name
         self.hist = None
         self.phase = None
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cleanup()
+
     def setup_refinement(self, exp_data_path, cif_file_path, phasename="MyPhase"):
         """
         Creates a new GSAS-II project and adds the experimental data and phase.
 
+        The set-up project is cached under GPX_CACHE_DIR, so repeating the setup
+        with unchanged files only copies the cached project. The cache keeps the
+        GPX_CACHE_MAX_ENTRIES most recently used projects.
+
         Args:
             exp_data_path (str): Path to the experimental data file (e.g., .xy).
             cif_file_path (str): Path to the CIF file for the crystal structure.
             phasename (str): A name to assign to the phase.
         """
         gpx_path = os.path.join(self.temp_dir, "refinement.gpx")
+        try:
+            cache_path = _setup_cache_path(exp_data_path, cif_file_path, phasename)
+        except OSError:
+            cache_path = None  # Let GSAS-II report the missing file below
+
+        if cache_path and os.path.exists(cache_path):
+            self.api.log(f"Reusing cached GSAS-II project: {cache_path}")
+            shutil.copyfile(cache_path, gpx_path)
+            try:
+                os.utime(cache_path)  # Mark as recently used for _prune_setup_cache
+            except OSError:
+                pass
+            self.gpx = G2s.G2Project(gpxfile=gpx_path)
+            self.hist = self.gpx.histograms()[0]
+            self.phase = self.gpx.phases()[0]
+            return
+
         self.api.log(f"Creating GSAS-II project at: {gpx_path}")
         self.gpx = G2s.G2Project(gpxfile=gpx_path)
 
@@ -66,6 +141,22 @@ class RietveldEngine:
         if not self.phase:
             raise RietveldError(f"Failed to load CIF file: {cif_file_path}")
 
+        if cache_path:
+            self._store_setup(gpx_path, cache_path)
+
+    def _store_setup(self, gpx_path, cache_path):
+        """Saves the freshly set-up project and copies it into the cache."""
+        try:
+            self.gpx.save()
+            os.makedirs(GPX_CACHE_DIR, exist_ok=True)
+            # Copy under a temporary name first so a reader never sees a partial file
+            partial_path = f"{cache_path}.{os.getpid()}.tmp"
+            shutil.copyfile(gpx_path, partial_path)
+            os.replace(partial_path, cache_path)
+            _prune_setup_cache()
+        except OSError as e:
+            self.api.log(f"Could not cache the GSAS-II project: {e}")
+
     def run_refinement(self, settings, cycles=5):
         """
         Configures and runs the refinement.
@@ -102,7 +193,8 @@ class RietveldEngine:
 
         Returns:
             dict: A dictionary containing results like 'rwp', 'chi2',
-                  'refined_params', and arrays for plotting ('x', 'y_obs', etc.).
+                  'refined_params', and float32 arrays for plotting
+                  ('x', 'y_obs', etc.).
         """
         if not self.gpx:
             raise RietveldError("No project loaded.")
@@ -110,22 +202,27 @@ class RietveldEngine:
         results_dict = self.hist.get_results()
         plot_data = self.hist.get_plottable()
 
+        # Converted once here so the plotting code receives contiguous arrays;
+        # float32 is ample precision for display and halves the buffers.
+        def to_f32(key):
+            return np.asarray(plot_data.get(key, []), dtype=np.float32)
+
         final_results = {
             'rwp': results_dict.get('Rwp', 0.0),
             'chi2': results_dict.get('chi**2', 0.0),
             'refined_params': self.phase.get_refined_params(),
-            'x': plot_data.get('x', []),
-            'y_obs': plot_data.get('y', []),
-            'y_calc': plot_data.get('ycalc', []),
-            'y_bkg': plot_data.get('bkg', []),
-            'y_diff': plot_data.get('y-ycalc', [])
+            'x': to_f32('x'),
+            'y_obs': to_f32('y'),
+            'y_calc': to_f32('ycalc'),
+            'y_bkg': to_f32('bkg'),
+            'y_diff': to_f32('y-ycalc')
         }
         return final_results
 
     def cleanup(self):
         """Deletes the temporary directory and all GSAS-II files."""
         if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+            self._tmp.cleanup()
             self.api.log(f"Cleaned up temporary directory: {self.temp_dir}")
 
 
@@ -1,14 +1,31 @@
+import asyncio
+import hashlib
+import mmap
 import os
 import sys
 import platform
-import subprocess
+import shlex
 import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 
 # =============================================================================
 # Configuration
 # =============================================================================
 GSASII_SVN_URL = "https://subversion.xray.aps.anl.gov/pyGSAS/trunk/GSASII"
 INSTALL_DIR_NAME = "GSASII"
+# Installer state kept between runs: pip's download cache and the hash of
+# the last successful bootstrap.
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'onexrd', 'gsas2')
+# Downloaded .deb archives for the SVN install on Linux, and how old (in seconds)
+# the package lists may get before 'apt-get update' runs again.
+APT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'onexrd', 'apt')
+APT_UPDATE_MAX_AGE = 3600
+# Seconds bootstrap.py may go without printing anything before it is treated as hung.
+BOOTSTRAP_IDLE_TIMEOUT = 30 * 60
+# Number of threads hashing the working copy (hashlib releases the GIL on large inputs).
+HASH_WORKERS = 4
 
 
 # =============================================================================
@@ -33,6 +50,103 @@ def print_color(text, color, bold=False):
         print(f"{color}{text}{Colors.ENDC}")
 
 
+# =============================================================================
+# Subprocess Helper
+# =============================================================================
+async def run_command(args, capture_output=False, shell=False, cwd=None, env=None, on_line=None, idle_timeout=None):
+    """
+    Runs a command through the event loop and waits for it to exit.
+
+    Args:
+        args (list[str] | str): The program and its arguments, or a command
+                                line if ``shell`` is True.
+        capture_output (bool): Capture stdout/stderr instead of showing them.
+        shell (bool): Run ``args`` through the system shell.
+        cwd (str, optional): The working directory for the command.
+        env (dict, optional): The environment for the command; inherited if None.
+        on_line (callable, optional): If given, stdout and stderr are read as
+                                      they are produced and each decoded line
+                                      is passed to it (takes precedence over
+                                      ``capture_output``).
+        idle_timeout (float, optional): With ``on_line``, the number of seconds
+                                        to wait for the next line before the
+                                        command is killed.
+
+    Returns:
+        tuple[int, bytes]: The exit code and the captured stdout (empty
+                           unless ``capture_output`` is True).
+
+    Raises:
+        FileNotFoundError: If the program does not exist.
+        TimeoutError: If the command printed nothing for ``idle_timeout`` seconds.
+    """
+    if on_line is not None:
+        stdout, stderr = asyncio.subprocess.PIPE, asyncio.subprocess.STDOUT
+    else:
+        stdout = stderr = asyncio.subprocess.PIPE if capture_output else None
+    # A larger line limit than the 64 KiB default so long tool output lines do not fail the read
+    kwargs = dict(stdout=stdout, stderr=stderr, cwd=cwd, env=env, limit=2 ** 20)
+    if shell:
+        process = await asyncio.create_subprocess_shell(args, **kwargs)
+    else:
+        process = await asyncio.create_subprocess_exec(*args, **kwargs)
+
+    if on_line is not None:
+        while True:
+            try:
+                line = await asyncio.wait_for(process.stdout.readline(), idle_timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise TimeoutError(f"No output for {idle_timeout} seconds") from None
+            if not line:
+                break
+            on_line(line.decode(errors='replace').rstrip())
+        return await process.wait(), b''
+    output, _ = await process.communicate()
+    return process.returncode, output or b''
+
+
+# =============================================================================
+# Working Copy Hash
+# =============================================================================
+def _file_digest(path):
+    """Returns the SHA-256 digest of a file, read through a memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().digest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return hashlib.sha256(mm).digest()
+
+
+def _tree_hash(root):
+    """
+    Hashes the contents of a directory tree, skipping svn metadata and Python
+    bytecode, which change without the installed files changing.
+
+    The files are hashed concurrently and their digests are combined in path
+    order, so the result does not depend on the number of workers.
+
+    Args:
+        root (str): The directory to hash.
+
+    Returns:
+        str: The hex SHA-256 of all relative paths and file digests.
+    """
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in (".svn", "__pycache__")]
+        paths.extend(os.path.join(dirpath, name) for name in filenames if not name.endswith((".pyc", ".pyo")))
+    paths.sort()
+
+    digest = hashlib.sha256()
+    with ThreadPoolExecutor(max_workers=HASH_WORKERS) as pool:
+        for path, file_digest in zip(paths, pool.map(_file_digest, paths)):
+            digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode() + b"\0")
+            digest.update(file_digest)
+    return digest.hexdigest()
+
+
 # =============================================================================
 # The Installer Class
 # =============================================================================
@@ -40,56 +154,118 @@ def print_color(text, color, bold=False):
 class Gsas2Installer:
     """Handles the step-by-step installation of GSAS-II."""
 
-    def __init__(self):
+    def __init__(self, ui=None):
+        """
+        Args:
+            ui (optional): A Tk window with a ``log_message(message, level)``
+                           method. If given, the output of svn and bootstrap.py
+                           is streamed to it line by line.
+        """
         self.os_type = platform.system()
         self.install_path = os.path.join(os.path.expanduser('~'), INSTALL_DIR_NAME)
-
-    def run(self):
-        """Executes the full installation process."""
+        self.ui = ui
+        # Without a UI the tools write straight to the terminal
+        self._on_line = self._post_line if ui is not None else None
+        # Result of the last svn probe; None until probed and after an install attempt
+        self._svn_ok = None
+
+    def _post_line(self, line, level="info"):
+        """Echoes a line of tool output and hands it to the UI's Tk thread."""
+        print(line)
+        try:
+            self.ui.after(0, self.ui.log_message, line, level)
+        except Exception:
+            pass  # The window was closed; the line is still on the terminal
+
+    def run_in_background(self):
+        """
+        Runs the installer on a worker thread with its own event loop, so the
+        Tk main loop stays responsive during the long svn and pip steps.
+
+        The thread is a daemon, like the batch processing worker, so closing
+        oneXRD is not held up by an install that is still running.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the result of run().
+        """
+        future = Future()
+
+        def worker():
+            try:
+                future.set_result(asyncio.run(self.run()))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=worker, daemon=True).start()
+        return future
+
+    async def run(self):
+        """
+        Executes the full installation process. Drive it with asyncio.run().
+
+        Returns:
+            bool: True if every step succeeded.
+        """
         self._print_welcome()
 
         if self.os_type not in ["Windows", "Linux"]:
             print_color(f"Unsupported OS: {self.os_type}. This script supports Windows and Linux.", Colors.FAIL)
-            sys.exit(1)
+            return False
 
-        if not self._check_svn():
-            if not self._install_svn():
-                sys.exit(1)
+        # Each step depends on the one before, so they are awaited in order
+        if not await self._check_svn():
+            if not await self._install_svn():
+                return False
 
-        if not self._checkout_gsas2():
-            sys.exit(1)
+        if not await self._checkout_gsas2():
+            return False
 
-        if not self._install_gsas2_dependencies():
-            sys.exit(1)
+        if not await self._install_gsas2_dependencies():
+            return False
 
         self._print_success()
+        return True
 
     def _print_welcome(self):
         print_color("--- oneXRD GSAS-II Dependency Installer ---", Colors.HEADER, bold=True)
         print("This script will guide you through installing GSAS-II and its dependencies.")
         print(f"GSAS-II will be installed in: {self.install_path}\n")
 
-    def _check_svn(self):
+    async def _check_svn(self):
         """Checks if the 'svn' command is available in the system PATH."""
         print_color("Step 1: Checking for SVN (Subversion)...", Colors.OKCYAN)
-        try:
-            subprocess.run(["svn", "--version"], check=True, capture_output=True)
+        if self._svn_ok is None:
+            # Scanning PATH first spares a process launch when svn is missing
+            self._svn_ok = shutil.which("svn") is not None
+            if self._svn_ok:
+                try:
+                    returncode, _ = await run_command(["svn", "--version"], capture_output=True)
+                except OSError:
+                    returncode = None
+                self._svn_ok = returncode == 0
+        if self._svn_ok:
             print_color("--> SVN is already installed. Proceeding.", Colors.OKGREEN)
             return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            print_color("--> SVN is not found.", Colors.WARNING)
-            return False
+        print_color("--> SVN is not found.", Colors.WARNING)
+        return False
 
-    def _install_svn(self):
+    async def _install_svn(self):
         """Guides the user through installing SVN."""
         print_color("\nStep 2: Installing SVN...", Colors.OKCYAN)
         if self.os_type == "Windows":
-            return self._install_svn_windows()
+            return await self._install_svn_windows()
         elif self.os_type == "Linux":
-            return self._install_svn_linux()
+            return await self._install_svn_linux()
         return False
 
-    def _install_svn_windows(self):
+    async def _install_svn_windows(self):
+        if self.ui is not None:
+            # There is no console to wait on; the user installs SVN and starts the installer again
+            self._post_line("SVN was not found. Install the VisualSVN command-line tools from "
+                            "https://www.visualsvn.com/visualsvn/download/tortoisesvn/ with the "
+                            "'command-line client tools' option enabled, then run the installer again.", "error")
+            return False
+
         print("On Windows, SVN must be installed manually.")
         print_color("Please follow these steps:", Colors.HEADER, bold=True)
         print("1. Download the VisualSVN command-line tools from here:")
@@ -100,46 +276,107 @@ class Gsas2Installer:
         print("   This option ensures the 'svn' command is added to your system's PATH.")
         print("4. After installation is complete, you may need to restart your terminal or command prompt.")
 
-        input(
+        await asyncio.to_thread(
+            input,
             f"\n{Colors.BOLD}Press Enter here after you have successfully installed the SVN command-line tools...{Colors.ENDC}")
 
-        return self._check_svn()
+        self._svn_ok = None
+        return await self._check_svn()
 
-    def _install_svn_linux(self):
+    async def _install_svn_linux(self):
         print("This script will attempt to install SVN using 'apt-get'.")
         print_color("This requires administrator (sudo) privileges.", Colors.WARNING)
+        if self.ui is not None:
+            self._post_line("Installing SVN with apt-get; sudo may ask for your password in the terminal "
+                            "oneXRD was started from.", "warning")
 
-        cmd = "sudo apt-get update && sudo apt-get install -y subversion"
-        print(f"Running command: {cmd}")
+        # apt requires the 'partial' subdirectory in its archives directory
+        os.makedirs(os.path.join(APT_CACHE_DIR, "partial"), exist_ok=True)
+        stamp_path = os.path.join(APT_CACHE_DIR, "last_update")
+        apt = f"sudo apt-get -o Dir::Cache::archives={shlex.quote(APT_CACHE_DIR)}"
 
         try:
-            subprocess.run(cmd, shell=True, check=True)
+            lists_fresh = time.time() - os.path.getmtime(stamp_path) < APT_UPDATE_MAX_AGE
+        except OSError:
+            lists_fresh = False
+        if not lists_fresh:
+            cmd = f"{apt} update"
+            print(f"Running command: {cmd}")
+            returncode, _ = await run_command(cmd, shell=True)
+            if returncode == 0:
+                with open(stamp_path, "w"):
+                    pass
+
+        # Install from the cached archives if they are complete, otherwise download
+        cmd = f"{apt} install -y --no-download subversion || {apt} install -y subversion"
+        print(f"Running command: {cmd}")
+
+        returncode, _ = await run_command(cmd, shell=True)
+        self._svn_ok = None
+        if returncode == 0:
             print_color("SVN installed successfully.", Colors.OKGREEN)
             return True
-        except subprocess.CalledProcessError as e:
-            print_color(f"SVN installation failed. Please try running '{cmd}' manually in your terminal.", Colors.FAIL)
-            return False
+        print_color(f"SVN installation failed. Please try running '{cmd}' manually in your terminal.", Colors.FAIL)
+        return False
 
-    def _checkout_gsas2(self):
-        """Checks out GSAS-II from the SVN repository."""
+    async def _checkout_gsas2(self):
+        """
+        Checks out GSAS-II from the SVN repository, or updates an existing checkout.
+
+        The checkout is a single 'svn checkout'. A working copy has one
+        metadata database that each update locks, so concurrent updates of
+        its subdirectories would only queue behind each other.
+        """
         print_color(f"\nStep 3: Checking out GSAS-II from SVN repository...", Colors.OKCYAN)
         if os.path.exists(self.install_path):
+            return await self._update_gsas2()
+
+        # The output goes to the terminal (or is streamed to the UI) so the user can see the progress
+        returncode, _ = await run_command(["svn", "checkout", GSASII_SVN_URL, self.install_path],
+                                          on_line=self._on_line)
+        return self._report_checkout(returncode)
+
+    async def _update_gsas2(self):
+        """Brings an existing checkout up to date, fetching only what changed."""
+        local_rev = await self._svn_revision(self.install_path)
+        if local_rev is None:
             print_color(f"--> Directory '{self.install_path}' already exists. Skipping checkout.", Colors.WARNING)
             return True
 
-        try:
-            # We stream the output so the user can see the progress
-            process = subprocess.run(
-                ["svn", "checkout", GSASII_SVN_URL, self.install_path],
-                check=True
-            )
+        head_rev = await self._svn_revision(GSASII_SVN_URL, head=True)
+        if head_rev is None:
+            print_color("--> Could not reach the SVN server; keeping the existing checkout.", Colors.WARNING)
+            return True
+        if head_rev == local_rev:
+            print_color(f"--> Existing checkout is up to date (revision {local_rev}).", Colors.OKGREEN)
+            return True
+
+        print(f"Updating existing checkout from revision {local_rev} to {head_rev}...")
+        returncode, _ = await run_command(["svn", "update", self.install_path], on_line=self._on_line)
+        return self._report_checkout(returncode)
+
+    @staticmethod
+    async def _svn_revision(target, head=False):
+        """
+        Returns the revision of a working copy, or the HEAD revision of a URL
+        if ``head`` is True. None if svn cannot tell.
+        """
+        args = ["svn", "info", "--show-item=revision"]
+        if head:
+            args += ["-r", "HEAD"]
+        returncode, stdout = await run_command(args + [target], capture_output=True)
+        revision = stdout.decode(errors='replace').strip()
+        return revision if returncode == 0 and revision else None
+
+    @staticmethod
+    def _report_checkout(returncode):
+        if returncode == 0:
             print_color("GSAS-II checked out successfully.", Colors.OKGREEN)
             return True
-        except subprocess.CalledProcessError:
-            print_color("Failed to check out GSAS-II from SVN.", Colors.FAIL)
-            return False
+        print_color("Failed to check out GSAS-II from SVN.", Colors.FAIL)
+        return False
 
-    def _install_gsas2_dependencies(self):
+    async def _install_gsas2_dependencies(self):
         """Runs the GSAS-II bootstrap script to install Python packages."""
         print_color("\nStep 4: Installing GSAS-II Python dependencies...", Colors.OKCYAN)
         bootstrap_script = os.path.join(self.install_path, "bootstrap.py")
@@ -148,19 +385,65 @@ class Gsas2Installer:
             print_color(f"Could not find bootstrap.py at '{bootstrap_script}'.", Colors.FAIL)
             return False
 
+        # Skip the bootstrap if it already succeeded for the same script and requirements
+        # with this interpreter, and the working copy is unchanged since then
+        bootstrap_key = self._bootstrap_key(bootstrap_script)
+        stamp_path = os.path.join(CACHE_DIR, "bootstrap.sha256")
+        try:
+            with open(stamp_path) as f:
+                stamp = f.read().split()
+        except OSError:
+            stamp = []
+        if stamp[:1] == [bootstrap_key]:
+            if stamp[1:] == [await asyncio.to_thread(_tree_hash, self.install_path)]:
+                print_color("--> Dependencies are already installed for this version. Skipping.", Colors.OKGREEN)
+                return True
+            print_color("--> GSAS-II files changed since the last install; running bootstrap again.", Colors.WARNING)
+
         print(f"Running {bootstrap_script} with Python executable: {sys.executable}")
         print("This may take several minutes...")
 
+        # pip keeps downloaded packages here, so a re-run does not fetch them again
+        env = dict(os.environ)
+        env.setdefault("PIP_CACHE_DIR", os.path.join(CACHE_DIR, "pip"))
+        # Without this the script's prints reach the pipe in blocks rather than as they happen
+        env["PYTHONUNBUFFERED"] = "1"
+
+        # Run bootstrap.py using the *same* python that is running this script. Its output is
+        # always read line by line, so a stalled install is noticed.
         try:
-            # Run bootstrap.py using the *same* python that is running this script
-            subprocess.run([sys.executable, bootstrap_script], check=True, cwd=self.install_path)
+            returncode, _ = await run_command([sys.executable, bootstrap_script], cwd=self.install_path, env=env,
+                                              on_line=self._on_line or print, idle_timeout=BOOTSTRAP_IDLE_TIMEOUT)
+        except TimeoutError:
+            print_color(f"bootstrap.py printed nothing for {BOOTSTRAP_IDLE_TIMEOUT // 60} minutes and was stopped.",
+                        Colors.FAIL)
+            returncode = None
+        if returncode == 0:
             print_color("GSAS-II dependencies installed successfully.", Colors.OKGREEN)
+            try:
+                tree_hash = await asyncio.to_thread(_tree_hash, self.install_path)
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                with open(stamp_path, "w") as f:
+                    f.write(f"{bootstrap_key}\n{tree_hash}\n")
+            except OSError:
+                pass  # Only means the next run bootstraps again
             return True
-        except subprocess.CalledProcessError:
-            print_color("Failed to install GSAS-II dependencies.", Colors.FAIL)
-            print_color("Please try running 'python bootstrap.py' manually inside the GSASII directory.",
-                        Colors.WARNING)
-            return False
+        print_color("Failed to install GSAS-II dependencies.", Colors.FAIL)
+        print_color("Please try running 'python bootstrap.py' manually inside the GSASII directory.",
+                    Colors.WARNING)
+        return False
+
+    def _bootstrap_key(self, bootstrap_script):
+        """Hashes what the bootstrap result depends on: its inputs and the interpreter."""
+        digest = hashlib.sha256()
+        digest.update(f"{sys.executable}|{sys.version}".encode())
+        for path in (bootstrap_script, os.path.join(self.install_path, "requirements.txt")):
+            try:
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+            except OSError:
+                digest.update(b"<missing>")
+        return digest.hexdigest()
 
     def _print_success(self):
         print_color("\n--- Installation Complete! ---", Colors.OKGREEN, bold=True)
@@ -174,4 +457,4 @@ class Gsas2Installer:
 
 if __name__ == "__main__":
     installer = Gsas2Installer()
-    installer.run()
\ No newline at end of file
+    sys.exit(0 if asyncio.run(installer.run()) else 1)
\ No newline at end of file
@@ -1,10 +1,89 @@
+from collections import deque
+
 import customtkinter as ctk
+import numpy as np
 from tkinter import filedialog
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 
+# How much wider than the new data the current axis limits may be and still be kept, so that
+# small changes between refinement cycles are blitted instead of redrawing the whole figure.
+LIMIT_SLACK = 0.1
+# Log lines are buffered and written to the textbox at most once per this many milliseconds.
+LOG_FLUSH_MS = 50
+# How often the GSAS-II install window checks whether the installer has finished, in milliseconds.
+INSTALL_POLL_MS = 500
+
+
+def _lttb(x, y, n_out):
+    """
+    Picks ``n_out`` points that keep the visual shape of a line (Largest-Triangle-Three-Buckets).
+
+    This vectorized variant anchors each bucket's triangle on the means of the
+    neighbouring buckets instead of the previously picked point, so all buckets
+    are solved at once.
+
+    Args:
+        x (np.ndarray): The x values, in ascending order.
+        y (np.ndarray): The y values used to choose the points.
+        n_out (int): The number of points to keep, including both end points.
+
+    Returns:
+        np.ndarray: The sorted indices of the kept points.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # n_out - 2 buckets over the interior points; every bucket has at least one point
+    starts = np.linspace(1, n - 1, n_out - 1).astype(int)[:-1]
+    counts = np.diff(np.append(starts, n - 1))
+    mean_x = np.add.reduceat(x[:n - 1], starts) / counts
+    mean_y = np.add.reduceat(y[:n - 1], starts) / counts
+
+    bucket = np.repeat(np.arange(n_out - 2), counts)
+    ax = np.concatenate(([x[0]], mean_x[:-1]))[bucket]
+    ay = np.concatenate(([y[0]], mean_y[:-1]))[bucket]
+    bx = np.concatenate((mean_x[1:], [x[-1]]))[bucket]
+    by = np.concatenate((mean_y[1:], [y[-1]]))[bucket]
+    px = x[1:n - 1]
+    py = y[1:n - 1]
+    area = np.abs((ax - bx) * (py - ay) - (ax - px) * (by - ay))
+
+    # First point reaching its bucket's maximum area
+    is_max = area == np.repeat(np.maximum.reduceat(area, starts - 1), counts)
+    _, first = np.unique(bucket[is_max], return_index=True)
+    picks = np.flatnonzero(is_max)[first] + 1
+    return np.concatenate(([0], picks, [n - 1]))
+
+
+class _BufferedLogMixin:
+    """
+    Gives a window a ``log_message`` that buffers lines and writes them to
+    ``self.log_textbox`` in batches. The window sets ``_log_buf`` and
+    ``_log_pending`` up in its ``__init__``.
+    """
 
-class RietveldWindow(ctk.CTkToplevel):
+    def log_message(self, message, level="info"):
+        self._log_buf.append(f"[{level.upper()}] {message}\n")
+        if not self._log_pending:
+            self._log_pending = True
+            self.after(LOG_FLUSH_MS, self._flush_log)
+
+    def _flush_log(self):
+        """Writes all buffered log lines to the textbox in a single update."""
+        text = "".join(self._log_buf)
+        self._log_buf.clear()
+        self._log_pending = False
+        self.log_textbox.configure(state="normal")
+        self.log_textbox.insert("end", text)
+        self.log_textbox.see("end")
+        self.log_textbox.configure(state="disabled")
+
+
+class RietveldWindow(_BufferedLogMixin, ctk.CTkToplevel):
     """The user interface for the Rietveld Refinement plugin."""
 
     def __init__(self, master, runner):
@@ -16,7 +95,12 @@ class RietveldWindow(ctk.CTkToplevel):
         self.geometry("950x800")
         self.grid_columnconfigure(0, weight=1)
         self.grid_rowconfigure(2, weight=1)  # The plot area expands
-        self.grab_set()
+        # Kept above the main window without a global grab, which would route every event through this window
+        self.transient(master)
+        self.focus_set()
+
+        self._log_buf = deque()
+        self._log_pending = False
 
         self._create_widgets()
 
@@ -88,6 +172,9 @@ class RietveldWindow(ctk.CTkToplevel):
         self.ax1, self.ax2 = self.figure.subplots(2, 1, sharex=True, gridspec_kw={'height_ratios': [3, 1]})
         self.canvas = FigureCanvasTkAgg(self.figure, results_frame)
         self.canvas.get_tk_widget().grid(row=0, column=0, sticky="nsew", padx=5, pady=(30, 5))
+        self._create_artists()
+        self.figure.tight_layout()
+        self.canvas.mpl_connect('resize_event', self._on_canvas_resize)
 
         # Info and Log
         info_frame = ctk.CTkFrame(results_frame, fg_color="transparent")
@@ -107,6 +194,39 @@ class RietveldWindow(ctk.CTkToplevel):
         self.log_textbox = ctk.CTkTextbox(info_frame, state="disabled", wrap="word")
         self.log_textbox.grid(row=2, column=0, sticky="nsew", pady=10)
 
+    def _create_artists(self):
+        """Creates the plot lines and static decorations once; updates only swap the data."""
+        # Animated artists are skipped by canvas draws and drawn by _draw_animated instead
+        self.l_obs, = self.ax1.plot([], [], 'b.', markersize=2, label='Observed', animated=True)
+        self.l_calc, = self.ax1.plot([], [], 'r-', label='Calculated', animated=True)
+        self.l_bkg, = self.ax1.plot([], [], 'g--', label='Background', animated=True)
+        self.ax1.set_ylabel("Intensity");
+        self.ax1.legend().set_animated(True)
+
+        self.l_diff, = self.ax2.plot([], [], 'k-', animated=True)
+        zero_line = self.ax2.axhline(0, color='r', linestyle='--', animated=True)
+        self.ax2.set_xlabel("Angle (2θ)");
+        self.ax2.set_ylabel("Difference")
+
+        self._data_lines = (self.l_obs, self.l_calc, self.l_bkg, self.l_diff)
+        # Artists that a full draw paints over the data lines, so they are drawn after them
+        self._overlays = (zero_line, self.ax1.get_legend())
+        # Figure without the animated artists, captured on every full draw, and the axis limits it was drawn with
+        self._bg = None
+        self._limits = None
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_canvas_resize(self, event):
+        self.figure.tight_layout()
+        self._bg = None
+
+    def _on_draw(self, event):
+        """Keeps the freshly drawn figure as the blitting background, then adds the animated artists."""
+        self._bg = self.canvas.copy_from_bbox(self.figure.bbox)
+        # Any draw (also one by Tk, e.g. when the window is mapped) sets the limits the background shows
+        self._limits = (self.ax1.get_xlim(), self.ax1.get_ylim(), self.ax2.get_ylim())
+        self._draw_animated()
+
     def _browse_exp(self):
         path = filedialog.askopenfilename(title="Select Experimental Data");
         if path: self.exp_path_entry.configure(state="normal"); self.exp_path_entry.delete(0,
@@ -138,12 +258,6 @@ class RietveldWindow(ctk.CTkToplevel):
         # The runner will perform the work in a separate thread in a real app
         self.runner.start_refinement(exp_path, cif_path, settings, cycles)
 
-    def log_message(self, message, level="info"):
-        self.log_textbox.configure(state="normal")
-        self.log_textbox.insert("end", f"[{level.upper()}] {message}\n")
-        self.log_textbox.see("end")
-        self.log_textbox.configure(state="disabled")
-
     def update_results(self, results):
         self.rwp_var.set(f"Rwp: {results['rwp']:.4f}%")
         self.chi2_var.set(f"χ²: {results['chi2']:.4f}")
@@ -151,29 +265,111 @@ class RietveldWindow(ctk.CTkToplevel):
         self.run_button.configure(state="normal", text="Run Refinement")
 
     def update_plot(self, results):
-        self.ax1.clear();
-        self.ax2.clear()
-        self.ax1.plot(results['x'], results['y_obs'], 'b.', markersize=2, label='Observed')
-        self.ax1.plot(results['x'], results['y_calc'], 'r-', label='Calculated')
-        self.ax1.plot(results['x'], results['y_bkg'], 'g--', label='Background')
-        self.ax1.set_ylabel("Intensity");
-        self.ax1.legend()
-
-        self.ax2.plot(results['x'], results['y_diff'], 'k-')
-        self.ax2.axhline(0, color='r', linestyle='--')
-        self.ax2.set_xlabel("Angle (2θ)");
-        self.ax2.set_ylabel("Difference")
-        self.figure.tight_layout()
-        self.canvas.draw()
+        x = results['x']
+        series = [results['y_obs'], results['y_calc'], results['y_bkg'], results['y_diff']]
+        # About two points per pixel are enough; the same indices keep the residual aligned
+        width = self.canvas.get_tk_widget().winfo_width()
+        if width > 1 and len(x) > 4 * width:
+            idx = _lttb(x, results['y_obs'], 2 * width)
+            x = x[idx]
+            series = [y[idx] for y in series]
+        for line, y in zip(self._data_lines, series):
+            line.set_data(x, y)
+
+        for ax in (self.ax1, self.ax2):
+            ax.relim()
+            ax.autoscale_view()
+        limits = (self.ax1.get_xlim(), self.ax1.get_ylim(), self.ax2.get_ylim())
+
+        if self._bg is not None and self._limits is not None and self._limits_still_fit(self._limits, limits):
+            # auto=None keeps autoscaling on for the next update
+            self.ax1.set_xlim(self._limits[0], auto=None)
+            self.ax1.set_ylim(self._limits[1], auto=None)
+            self.ax2.set_ylim(self._limits[2], auto=None)
+            self._blit_lines()
+        else:
+            # Ticks and labels change with the limits, so the whole figure is redrawn
+            self._limits = limits
+            self.canvas.draw()
+
+    @staticmethod
+    def _limits_still_fit(old, new, slack=LIMIT_SLACK):
+        """True if each new (low, high) range lies within the old one and the old is at most ``slack`` wider."""
+        for (old_lo, old_hi), (new_lo, new_hi) in zip(old, new):
+            if new_lo < old_lo or new_hi > old_hi or (old_hi - old_lo) > (1 + slack) * (new_hi - new_lo):
+                return False
+        return True
+
+    def _draw_animated(self):
+        """Draws the data lines, then the overlays on top of them."""
+        for artist in self._data_lines + self._overlays:
+            artist.axes.draw_artist(artist)
+
+    def _blit_lines(self):
+        """Restores the cached background and draws only the animated artists over it."""
+        self.canvas.restore_region(self._bg)
+        self._draw_animated()
+        self.canvas.blit(self.figure.bbox)
+
+
+class Gsas2InstallWindow(_BufferedLogMixin, ctk.CTkToplevel):
+    """Runs the GSAS-II installer in the background and shows its output."""
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Install GSAS-II")
+        self.geometry("750x450")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+        self.transient(master)
+
+        self._log_buf = deque()
+        self._log_pending = False
+
+        self.status_var = ctk.StringVar(value="Installing GSAS-II. This may take several minutes...")
+        ctk.CTkLabel(self, textvariable=self.status_var, wraplength=700, justify="left").grid(
+            row=0, column=0, sticky="w", padx=10, pady=(10, 0))
+        self.log_textbox = ctk.CTkTextbox(self, state="disabled", wrap="word")
+        self.log_textbox.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
+
+        # Imported here so this module's standalone test block still runs as a script
+        from .install_gsas2 import Gsas2Installer
+
+        # The installer posts its output lines to log_message through after()
+        self._installer = Gsas2Installer(ui=self)
+        self._future = self._installer.run_in_background()
+        self.after(INSTALL_POLL_MS, self._check_install)
+
+    def _check_install(self):
+        """Polls the installer from the Tk thread and reports the outcome once it is done."""
+        if not self._future.done():
+            self.after(INSTALL_POLL_MS, self._check_install)
+            return
+        try:
+            succeeded = self._future.result()
+        except Exception as e:
+            self.log_message(f"The installer stopped with an error: {e}", "error")
+            succeeded = False
+        if succeeded:
+            self.status_var.set(f"GSAS-II was installed in '{self._installer.install_path}'. Add this directory "
+                                "to your PYTHONPATH and restart oneXRD to use Rietveld refinement.")
+        else:
+            self.status_var.set("The installation did not complete. See the log below and the terminal "
+                                "oneXRD was started from for details.")
 
 
 # Standalone Test Block
 if __name__ == '__main__':
-    import numpy as np
-
-
     class MockEngine:
-        def __init__(self, ui): self.ui = ui
+        def __init__(self, ui):
+            self.ui = ui
+            self._rng = np.random.default_rng()
+            # The fake pattern is fixed; only the noise changes between runs, into reused buffers
+            self._x = np.linspace(10, 80, 1000)
+            self._y_calc = 100 + 500 * np.exp(-(self._x - 30) ** 2 / 0.5)
+            self._y_bkg = np.full_like(self._x, 100)
+            self._noise = np.empty_like(self._x)
+            self._y_obs = np.empty_like(self._x)
 
         def start_refinement(self, exp, cif, settings, cycles):
             self.ui.log_message("MockEngine: Refinement started.", "info")
@@ -182,13 +378,13 @@ if __name__ == '__main__':
 
         def finish_refinement(self):
             # Create fake but plausible results data
-            x = np.linspace(10, 80, 1000)
-            y_obs = 100 + 500 * np.exp(-(x - 30) ** 2 / 0.5) + np.random.rand(1000) * 10
-            y_calc = 100 + 500 * np.exp(-(x - 30) ** 2 / 0.5)
+            self._rng.random(out=self._noise)
+            self._noise *= 10
+            np.add(self._y_calc, self._noise, out=self._y_obs)
             results = {
-                'rwp': 8.5432, 'chi2': 1.8765, 'x': x,
-                'y_obs': y_obs, 'y_calc': y_calc, 'y_bkg': np.full_like(x, 100),
-                'y_diff': y_obs - y_calc
+                'rwp': 8.5432, 'chi2': 1.8765, 'x': self._x,
+                'y_obs': self._y_obs, 'y_calc': self._y_calc, 'y_bkg': self._y_bkg,
+                'y_diff': self._noise  # == y_obs - y_calc
             }
             self.ui.log_message("MockEngine: Refinement finished.", "success")
             self.ui.update_results(results)
@@ -1,16 +1,21 @@
-from pymatgen.ext.matproj import MPRester
+from mp_api.client import MPRester
 
 API_KEY = "your_key"  #  Materials Project's API Key
-mpr = MPRester(API_KEY)
+
+# material id -> CIF file name
+MATERIALS = {
+    "mp-1143": "Al2O3_mp-1143.cif",  # Al2O3 CIF（Corundum）
+    "mp-2133": "ZnO_mp-2133.cif",  # ZnO CIF（Zincite）
+}
 
 print("[OK] Start downloading!")
 
-# download Al2O3 CIF（Corundum）
-al2o3_structure = mpr.get_structure_by_material_id("mp-1143")
-al2o3_structure.to(filename="Al2O3_mp-1143.cif")
+# One query for all materials instead of one round-trip per structure
+with MPRester(API_KEY) as mpr:
+    docs = mpr.materials.summary.search(material_ids=list(MATERIALS), fields=["material_id", "structure"])
 
-# download ZnO CIF（Zincite）
-zno_structure = mpr.get_structure_by_material_id("mp-2133")
-zno_structure.to(filename="ZnO_mp-2133.cif")
+by_id = {str(doc.material_id): doc.structure for doc in docs}
+for material_id, filename in MATERIALS.items():
+    by_id[material_id].to(filename=filename)
 
-print("[OK] CIF saved：Al2O3_mp-1143.cif & ZnO_mp-2133.cif")
+print(f"[OK] CIF saved：{' & '.join(MATERIALS.values())}")